@@ -1,9 +1,10 @@
-from flask import Blueprint, request, jsonify, current_app, redirect, url_for, send_file
+from flask import Blueprint, request, jsonify, current_app, redirect, url_for, send_file, Response, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
 import os
 import uuid
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 import json
 import sys
@@ -15,7 +16,6 @@ from services.deepgram_service import DeepgramService
 from services.gemini_service import GeminiService
 from utils.data_processor import DataProcessor
 from utils.visualization import VisualizationHelper
-from utils.pdf_generator import SpeechAnalysisPDF
 from models import db, User, Analysis, PracticeSession
 
 # Create blueprint
@@ -59,7 +59,11 @@ if not DEEPGRAM_API_KEY:
 # Initialize services
 speech_analyzer = SpeechAnalyzer()
 deepgram_service = DeepgramService(api_key=DEEPGRAM_API_KEY)
-gemini_service = GeminiService(api_key=GEMINI_API_KEY)
+gemini_service = GeminiService(
+    api_key=GEMINI_API_KEY,
+    disk_cache_path=os.environ.get('GEMINI_CACHE_PATH'),
+    semantic_chat_cache=os.environ.get('GEMINI_SEMANTIC_CHAT_CACHE', '').lower() in ('1', 'true')
+)
 visualization_helper = VisualizationHelper()
 
 # Configure audio segmenter
@@ -205,31 +209,42 @@ def upload_video():
             # Get total duration of the full audio
             total_duration = data_processor.get_audio_duration(full_audio_path)
             
-            # Analyze the segments for emotions
-            results = speech_analyzer.analyze_segments(output_dir)
-            
-            # Get segment durations
-            segment_durations = [data_processor.get_audio_duration(path) for path in segment_paths]
-            
-            # Process emotion data into time-based segments
-            emotion_segments = data_processor.process_emotion_data(
-                results, 
-                total_duration, 
-                segment_durations
-            )
-            
             # Calculate average segment duration (for WPS)
             average_segment_duration = total_duration / len(segment_paths) if segment_paths else 0
             
-            # Transcribe segments using Deepgram
-            transcription_data = deepgram_service.transcribe_segments(
-                segment_paths, 
-                average_segment_duration,
-                emotion_data=emotion_segments
-            )
+            # Transcribe segments using Deepgram in the background; the requests are
+            # network-bound, so they overlap with emotion inference below
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                transcription_future = executor.submit(
+                    deepgram_service.transcribe_segments,
+                    segment_paths,
+                    average_segment_duration
+                )
+                
+                # Analyze the segments for emotions
+                results = speech_analyzer.analyze_segments(output_dir)
+                
+                # Get segment durations
+                segment_durations = [data_processor.get_audio_duration(path) for path in segment_paths]
+                
+                # Process emotion data into time-based segments
+                emotion_segments = data_processor.process_emotion_data(
+                    results, 
+                    total_duration, 
+                    segment_durations
+                )
+                
+                transcription_data = transcription_future.result()
+            
+            # Attach each segment's emotion now that both are available
+            for segment in transcription_data:
+                index = segment["index"]
+                segment["emotion"] = emotion_segments[index][1] if index < len(emotion_segments) else "unknown"
             
             # Generate LLM insights
-            gemini_analysis = gemini_service.analyze_speech(emotion_segments, transcription_data)
+            gemini_analysis = gemini_service.analyze_speech(
+                emotion_segments, transcription_data, namespace=str(current_user.id)
+            )
             
             # Log the analysis result
             print(f"Gemini analysis summary: {gemini_analysis.get('summary', 'Not available')[:100]}...", file=sys.stderr)
@@ -243,8 +258,7 @@ def upload_video():
             )
             
             # Prepare visualization data
-            emotion_df = visualization_helper.prepare_emotion_timeline_data(emotion_segments)
-            emotion_metrics = visualization_helper.calculate_emotion_metrics(emotion_df)
+            emotion_metrics = visualization_helper.calculate_emotion_metrics_from_segments(emotion_segments)
             wps_data = None
             speech_clarity = None
             
@@ -323,7 +337,9 @@ def chat_with_coach():
                                     for seg in emotion_segments])
         
         # Generate response from Gemini
-        response = gemini_service.generate_chat_response(user_input, emotion_context)
+        response = gemini_service.generate_chat_response(
+            user_input, emotion_context, namespace=str(current_user.id)
+        )
         
         # Generate audio feedback using Deepgram TTS only if requested
         audio_url = None
@@ -343,6 +359,33 @@ def chat_with_coach():
         traceback.print_exc(file=sys.stderr)
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/chat/stream', methods=['POST'])
+@login_required
+def chat_with_coach_stream():
+    """Stream the AI coach's chat response as server-sent events"""
+    data = request.json or {}
+    user_input = data.get('message', '')
+    emotion_segments = data.get('emotion_segments', [])
+    
+    # Format emotion context for Gemini
+    emotion_context = "\n".join([f"{seg['time_range']}: {seg['emotion']}" 
+                                for seg in emotion_segments])
+    chunks = gemini_service.generate_chat_response_stream(
+        user_input, emotion_context, namespace=str(current_user.id)
+    )
+    
+    def generate_events():
+        # Each chunk is one "message" event; a final "done" event marks the end of the reply
+        for chunk in chunks:
+            yield f"data: {json.dumps({'text': chunk})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(
+        stream_with_context(generate_events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @api_bp.route('/chat-voice', methods=['POST'])
 @login_required
 def chat_with_coach_voice():
@@ -379,7 +422,9 @@ def chat_with_coach_voice():
             # Get Gemini response
             emotion_context = "\n".join([f"{seg.get('time_range', '')}: {seg.get('emotion', '')}" 
                                         for seg in emotion_segments])
-            coach_response = gemini_service.generate_chat_response(user_text, emotion_context)
+            coach_response = gemini_service.generate_chat_response(
+                user_text, emotion_context, namespace=str(current_user.id)
+            )
             
             print(f"Coach response: '{coach_response[:100]}...'", file=sys.stderr)
             
@@ -582,6 +627,9 @@ def export_pdf(analysis_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
+        # Imported here so reportlab only loads once a report is actually exported
+        from utils.pdf_generator import SpeechAnalysisPDF
+        
         pdf_generator = SpeechAnalysisPDF()
         pdf_buffer = pdf_generator.generate_pdf(analysis, current_user)
         
@@ -626,8 +674,8 @@ def analyze_conversation():
                 'error': 'Conversation too short to analyze'
             }), 400
         
-        # Analyze using Gemini service
-        gemini_service = GeminiService()
+        # Analyze using the shared Gemini service; constructing a new one per request
+        # reconfigures the SDK client and drops its pooled connection
         analysis = gemini_service.analyze_conversation(transcript)
         
         return jsonify({
@@ -756,35 +804,14 @@ def get_practice_session(session_id):
 def healthcheck():
     """Simple health check endpoint"""
     # Check service status with detailed diagnostics
-    gemini_status = "unavailable"
-    gemini_details = {}
-    
-    if gemini_service.model is not None:
-        gemini_status = "available"
-        gemini_details['model_exists'] = True
-        gemini_details['has_generate_content'] = hasattr(gemini_service.model, 'generate_content')
-        
-        # Try a quick test call to verify it actually works
-        try:
-            test_response = gemini_service.model.generate_content("Test")
-            gemini_details['test_call_success'] = True
-            gemini_details['test_response_has_text'] = hasattr(test_response, 'text') if test_response else False
-        except Exception as e:
-            gemini_status = "error"
-            gemini_details['test_call_error'] = str(e)
-    else:
-        gemini_details['model_exists'] = False
-        gemini_details['reason'] = "Model is None - check initialization logs"
+    gemini_health = gemini_service.health_check()
     
     deepgram_status = "available" if deepgram_service.client is not None else "unavailable"
     
     return jsonify({
         'status': 'ok',
         'services': {
-            'gemini': {
-                'status': gemini_status,
-                'details': gemini_details
-            },
+            'gemini': gemini_health,
             'deepgram': deepgram_status
         }
     }), 200
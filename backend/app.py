@@ -4,7 +4,17 @@ from flask_login import LoginManager
 from authlib.integrations.flask_client import OAuth
 import os
 import sys
+import logging
 from dotenv import load_dotenv
+
+# Configure logging before the services are imported (they initialize at import time).
+# Verbosity is controlled via LOG_LEVEL (e.g. DEBUG, INFO, WARNING).
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+    stream=sys.stderr
+)
+
 from api.routes import api_bp
 from models import db, User, PracticeSession
 
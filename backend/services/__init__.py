@@ -5,11 +5,15 @@ from services.audio_service import AudioSegmenter, AudioSegmenterConfig
 from services.speech_analysis import SpeechAnalyzer
 from services.deepgram_service import DeepgramService
 from services.gemini_service import GeminiService
+from services.response_cache import ResponseCache, SemanticCache, DiskCache
 
 __all__ = [
     'AudioSegmenter',
     'AudioSegmenterConfig',
     'SpeechAnalyzer',
     'DeepgramService',
-    'GeminiService'
+    'GeminiService',
+    'ResponseCache',
+    'SemanticCache',
+    'DiskCache'
 ]
@@ -6,6 +6,10 @@ import uuid
 import statistics
 from typing import List, Dict, Tuple, Any, Optional
 from deepgram import DeepgramClient
+import numpy as np
+
+# Below this many segments the pure-Python statistics beat numpy's per-call overhead
+NUMPY_STATS_MIN_SEGMENTS = 64
 
 class DeepgramService:
     """
@@ -401,12 +405,16 @@ class DeepgramService:
         wps_values = [segment["wps"] for segment in transcription_data]
         
         # Calculate metrics
-        avg_wps = sum(wps_values) / len(wps_values)
-        
         # Calculate standard deviation for more meaningful variation metric
         # Standard deviation is more statistically meaningful than range
         # Typical standard deviation for natural speech is around 0.3-0.7 WPS
-        wps_variation = statistics.stdev(wps_values) if len(wps_values) > 1 else 0
+        if len(wps_values) >= NUMPY_STATS_MIN_SEGMENTS:
+            wps_array = np.asarray(wps_values, dtype=np.float64)
+            avg_wps = float(wps_array.mean())
+            wps_variation = float(wps_array.std(ddof=1))
+        else:
+            avg_wps = sum(wps_values) / len(wps_values)
+            wps_variation = statistics.stdev(wps_values) if len(wps_values) > 1 else 0
         total_words = sum(len(segment["text"].split()) for segment in transcription_data)
         
         # Identify segments that are too fast or too slow
@@ -447,8 +455,7 @@ class DeepgramService:
         
         # Format time helper function
         def format_time(seconds: float) -> str:
-            minutes = int(seconds // 60)
-            seconds = int(seconds % 60)
+            minutes, seconds = divmod(int(seconds), 60)
             return f"{minutes:02d}:{seconds:02d}"
         
         # Build the formatted transcript
@@ -1,40 +1,591 @@
 import google.generativeai as genai
+from google import genai as google_genai
+from google.genai import types as genai_types
+import asyncio
+import atexit
+import copy
+import functools
+import gzip
 import json
+import logging
 import re
 import os
-import sys
-import statistics
-from typing import Dict, List, Tuple, Any, Optional
-from datetime import datetime
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple, Any, Optional
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import numpy as np
+
+from services.response_cache import DiskCache, ResponseCache, SemanticCache, _json_dumps, _json_loads
+
+logger = logging.getLogger(__name__)
+
+# Set up the model - NO TOKEN LIMITS
+# Set max_output_tokens to maximum allowed (64,000 for gemini-3-flash)
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 64000,  # Maximum allowed - NO LIMITS
+}
+
+# Speech analyses are returned as JSON constrained to this schema, so the response
+# can be parsed directly instead of being extracted from prose or code fences
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "improvement_areas": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "coaching_tips": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["summary", "improvement_areas", "strengths", "coaching_tips"],
+}
+ANALYSIS_GENERATION_CONFIG = {
+    **GENERATION_CONFIG,
+    "response_mime_type": "application/json",
+    "response_schema": ANALYSIS_RESPONSE_SCHEMA,
+}
+
+# Disable all safety filters for speech analysis
+# BLOCK_NONE allows all content through for analysis purposes
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+# Static coaching rubric and response format for speech analysis. Sent once as the
+# analysis model's system instruction; the per-call prompt only carries the data.
+ANALYSIS_SYSTEM_INSTRUCTION = """You are a professional speech coach analyzing speech data to help someone improve their communication skills. Each request contains either a timeline of speech segments with transcriptions, speaking rate (words per second) and detected emotions, or only an emotion timeline.
+
+When a speech timeline is provided, give constructive feedback on:
+
+1. Speaking Rate:
+   - Compare the average speaking rate with the optimal range of 2.0-3.0 WPS
+   - Consider the rate variation (higher variation can indicate better engagement)
+   - Address the specific segments flagged as too fast or too slow
+
+2. Emotional Expression:
+   - Consider the number of emotion transitions
+   - Evaluate whether the emotions match the content of each segment
+   - Suggest where emotional variety could improve engagement
+
+3. Clarity and Enunciation:
+   - Identify any unclear or nonsensical phrases that suggest poor enunciation. (If words are spoken too fast, or too quietly, or pronounced incorrectly, they may be unclear on the transcription. Please assume that the user's speech is written correctly, and that the transcription looking incorrect is due to the user speaking too fast, or too quietly, or pronounced incorrectly. This is mostly fixed by enunciating more clearly and slowing down.)
+   - Suggest specific techniques to improve clarity
+
+4. Overall Presentation:
+   - Provide 3-5 specific action items to improve this speech
+   - Suggest a practice exercise tailored to this speaker's needs
+
+When only an emotion timeline is provided, base your analysis on the emotional pattern:
+1. Provide a brief summary of the speaker's emotional journey
+2. Identify 3 specific areas for improvement
+3. Point out 2-3 emotional strengths
+4. Give 3-5 practical coaching tips to help the speaker improve
+
+IMPORTANT: Respond ONLY with valid JSON. Do not include any explanatory text, markdown formatting, or code blocks. Return ONLY the JSON object itself.
+
+Your response must be EXACTLY in this JSON structure:
+{
+  "summary": "Your overall analysis and key observations",
+  "improvement_areas": ["Area 1", "Area 2", "Area 3"],
+  "strengths": ["Strength 1", "Strength 2"],
+  "coaching_tips": ["Tip 1", "Tip 2", "Tip 3"]
+}"""
+
+# When an analysis is cut off at the output token limit, ask only for the rest of the
+# JSON instead of regenerating it
+CONTINUATION_PROMPT = """The following JSON is incomplete. Output ONLY the remaining suffix that would make it parse, starting from the next character. Do not repeat any of the partial text.
+
+Partial: {partial}"""
+
+# Chat replies are short plain-text answers, so they use a smaller, faster model
+# with a capped output length
+CHAT_MODEL_NAME = "gemini-2.5-flash-lite"
+CHAT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "max_output_tokens": 512,
+}
+
+# Chat is interactive: bound the wait so a slow call falls back to the canned reply
+# instead of stalling the user (analyses keep the SDK defaults)
+CHAT_REQUEST_OPTIONS = {"timeout": 20}
+
+# Output budget for the health-check probe; thinking models can spend a tiny cap
+# before producing any text, so health is judged by the candidate, not its text
+HEALTH_CHECK_GENERATION_CONFIG = {"max_output_tokens": 256}
+
+# Static coaching persona for the chat feature (matches the Voice Agent style)
+CHAT_SYSTEM_INSTRUCTION = """# Role
+You are an expert speech coach helping someone improve their public speaking. You just analyzed their speech and now you're having a text conversation with them to provide personalized coaching.
+
+# General Guidelines
+- Be warm, encouraging, and supportive—but also honest about areas to improve
+- Write clearly and naturally in plain language
+- Keep responses concise (2-4 sentences) unless they ask for details
+- Do not use markdown formatting like code blocks, quotes, bold, links, or italics
+- Use line breaks in lists if needed
+- Use varied phrasing; avoid repetition
+- If unclear what they're asking, ask for clarification
+- If asked about your well-being, respond briefly and kindly
+
+# Style
+- Use active listening cues like "I noticed" or "I saw that"
+- Be warm and understanding, but concise
+- Use simple words unless they use technical terms
+- Celebrate their strengths before discussing improvements
+- Reference specific moments from their speech when relevant
+
+# Conversation Flow
+- Your primary goal is to help them understand their performance and improve
+- This may include:
+  - Specific feedback on pacing, emotions, or clarity
+  - Tips for particular moments in their speech
+  - Exercises to practice
+  - Explanations of their metrics
+  - Encouragement and next steps
+
+# Their Speech Data
+Each message includes the emotion pattern detected in their speech, followed by their question.
+
+# How to Reference Their Speech
+- Use natural time references: "around one minute in" not "at 1:23"
+- Cite specific phrases they said when relevant
+- Connect feedback to exact moments when possible
+- Point out patterns you notice in their emotional expression
+
+# Off-Scope Questions
+If they ask about things outside speech coaching (health issues, unrelated topics):
+"I'm focused on speech coaching, but I'm happy to help with anything related to your presentation skills"
+
+Remember: Be conversational, specific, and encouraging. Reference their actual performance data when giving feedback. Keep your response in plain text without any markdown formatting."""
+
+# Exact-match cache for analysis and chat responses
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_TTL_SECONDS = 3600
+
+# Semantic (embedding-similarity) cache for coach chat questions
+EMBEDDING_MODEL_NAME = "models/gemini-embedding-001"
+# Embedding runs before generation starts, so a slow endpoint must not hold up the reply
+EMBEDDING_REQUEST_OPTIONS = {"timeout": 2}
+SEMANTIC_CACHE_CAPACITY = 512
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# Near-duplicate speeches (retries, re-recordings of the same script) can optionally
+# reuse an analysis; the bar is higher than for chat since the advice is speech-specific
+ANALYSIS_SEMANTIC_CACHE_THRESHOLD = 0.97
+
+# Structural cache: reuses analyses of speeches with the same bucketed statistics
+WPS_TIER_BOUNDARIES = (1.0, 2.0, 3.0)
+STRUCTURAL_CACHE_BOUNDARY_MARGIN = 0.125
+DOMINANT_EMOTION_PLACEHOLDER = "{dominant_emotion}"
+_TIMESTAMP_RE = re.compile(r"\b\d{1,2}:\d{2}\b")
+# Templates must not carry the speaker's words into another speech: quoted spans, or
+# any run of this many consecutive transcript words, keep an analysis out of the cache
+STRUCTURAL_CACHE_NGRAM_WORDS = 4
+_QUOTED_SPAN_RE = re.compile(r'["\u201c][^"\u201c\u201d]+["\u201d]|\u2018[^\u2018\u2019]+\u2019')
+_WORD_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Gemini Batch API (offline/bulk analyses)
+BATCH_POLL_INTERVAL_SECONDS = 30
+BATCH_TERMINAL_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+})
+
+# Gemini context caching of the analysis system instruction (opt-in)
+CONTEXT_CACHE_TTL_SECONDS = 3600
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 300
+
+# Concurrent (asyncio) analyses
+ASYNC_MAX_CONCURRENCY = 16
+
+# Fallback parsing of a non-JSON response: fenced ```json block or any fenced block,
+# then a scan for the first decodable object
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_FENCE_RE = re.compile(r'```\s*(.*?)\s*```', re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
+# Debug log rotation: one JSONL file, rotated backups are gzip-compressed
+DEBUG_LOG_FILENAME = "responses.jsonl"
+DEBUG_LOG_MAX_BYTES = 50_000_000
+DEBUG_LOG_BACKUP_COUNT = 5
+DEBUG_LOG_QUEUE_SIZE = 1024  # records beyond this backlog are dropped
+# Records are buffered and written in batches: when the buffer fills, or after
+# this many seconds (the listener also flushes when it goes idle)
+DEBUG_LOG_BUFFER_BYTES = 64 * 1024
+DEBUG_LOG_FLUSH_INTERVAL_SECONDS = 2.0
+
+
+@functools.lru_cache(maxsize=64)
+def _word_re(word: str) -> "re.Pattern[str]":
+    """Compile (once per word) a pattern matching the word as a whole word."""
+    return re.compile(rf"\b{re.escape(word)}\b")
+
+
+def _word_ngrams(text: str, n: int) -> set:
+    """Get the set of n-word sequences in a text, ignoring case and punctuation."""
+    words = _WORD_TOKEN_RE.findall(text.lower().replace("\u2019", "'"))
+    return set(zip(*(words[i:] for i in range(n))))
+
+
+def _iter_strings(value: Any) -> Iterator[str]:
+    """Yield every string nested in a parsed JSON value."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def _format_time(seconds: float) -> str:
+    """Format a time offset in seconds as MM:SS."""
+    minutes, seconds_remainder = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds_remainder:02d}"
+
+
+_configured_api_key = None
+
+
+def _configure_genai(api_key: str) -> None:
+    """Configure the Gemini SDK, skipping the call when it is already set up with this key."""
+    global _configured_api_key
+    if api_key != _configured_api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
+
+def _describe_gemini_error(error: Exception) -> str:
+    """
+    Explain a failed Gemini call in terms of its most likely setup problem.
+
+    Args:
+        error: Exception raised by the Gemini SDK
+
+    Returns:
+        Human-readable description of the failure
+    """
+    error_msg = str(error)
+    if "API key" in error_msg or "403" in error_msg or "401" in error_msg:
+        return f"API key authentication failed: {error_msg}. Check that your GEMINI_API_KEY is valid and the Generative Language API is enabled."
+    if "404" in error_msg or "not found" in error_msg.lower():
+        return f"Model not found: {error_msg}. The model name may be incorrect or not available in your region."
+    if "quota" in error_msg.lower() or "billing" in error_msg.lower():
+        return f"Quota or billing issue: {error_msg}. Check your Google Cloud billing and quotas."
+    return f"Gemini call failed: {error_msg}"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated debug log into its gzip backup."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records when the queue is full and defers formatting to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The record never leaves the process, so the listener thread can format it
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class _DrainingQueueListener(QueueListener):
+    """
+    Queue listener whose stop waits for room in a full queue instead of failing,
+    and which flushes its handlers whenever the queue has been idle for a flush interval.
+    """
+
+    def dequeue(self, block: bool) -> Any:
+        while True:
+            try:
+                return self.queue.get(block, timeout=DEBUG_LOG_FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush_buffer()
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class _BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that writes records through a large buffer instead of flushing each one.
+    
+    RotatingFileHandler checks the size with seek/tell before every record, which flushes
+    the buffer, and formats each record twice. This handler formats once and keeps its own
+    count of the bytes in the file, so the buffer only reaches disk when it fills, on
+    rotation, or from flush_buffer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_flush = time.monotonic()
+        self._bytes_written = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=DEBUG_LOG_BUFFER_BYTES, encoding=self.encoding, errors=self.errors)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # Only consulted by the base emit; kept consistent with the byte count
+        return 0 < self.maxBytes <= self._bytes_written
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode(self.encoding or "utf-8"))
+            if self.maxBytes > 0 and self._bytes_written and self._bytes_written + size > self.maxBytes:
+                self.doRollover()
+                self._bytes_written = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += size
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        # Called after every record; only write out once the flush interval has passed
+        if time.monotonic() - self._last_flush >= DEBUG_LOG_FLUSH_INTERVAL_SECONDS:
+            self.flush_buffer()
+
+    def flush_buffer(self) -> None:
+        """Write out everything buffered so far."""
+        super().flush()
+        self._last_flush = time.monotonic()
+
+
+class _JSONLineFormatter(logging.Formatter):
+    """Serialize a dict log message as a single JSON line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            return _json_dumps(record.msg)
+        return super().format(record)
+
+
+def _get_debug_logger(log_dir: str) -> logging.Logger:
+    """
+    Get the logger that appends Gemini debug records to a single rotating JSONL file.
+
+    Records are handed to a background listener thread through a bounded queue, so
+    serialization, the file write and any rotation/compression never run on the
+    request path. Records are dropped rather than blocking when the queue is full.
+    The listener writes through a buffer and flushes in batches.
+
+    Args:
+        log_dir: Directory holding the debug log
+
+    Returns:
+        A non-propagating logger that writes one JSON record per line
+    """
+    debug_logger = logging.getLogger(f"{__name__}.responses")
+    if not debug_logger.handlers:
+        handler = _BufferedRotatingFileHandler(
+            os.path.join(log_dir, DEBUG_LOG_FILENAME),
+            maxBytes=DEBUG_LOG_MAX_BYTES,
+            backupCount=DEBUG_LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        handler.namer = lambda name: name + ".gz"
+        handler.rotator = _gzip_rotator
+        handler.setFormatter(_JSONLineFormatter("%(message)s"))
+        records = queue.Queue(maxsize=DEBUG_LOG_QUEUE_SIZE)
+        listener = _DrainingQueueListener(records, handler)
+        listener.start()
+        atexit.register(listener.stop)
+        debug_logger.addHandler(_DroppingQueueHandler(records))
+        debug_logger.setLevel(logging.INFO)
+        debug_logger.propagate = False
+    return debug_logger
+
 
 class GeminiService:
     """
     Service class for interacting with the Gemini API to generate feedback
     for speech analysis.
+
+    Create one instance per process and share it: initialization configures the
+    SDK client, whose transport keeps a persistent HTTP/2 connection to the API.
     """
+
+    # Fields every parsed analysis must have
+    _REQUIRED = frozenset(("summary", "improvement_areas", "strengths", "coaching_tips"))
     
-    def __init__(self, api_key: Optional[str] = None, debug_mode: bool = True):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        debug_mode: bool = True,
+        structural_cache: bool = False,
+        context_cache: bool = False,
+        legacy_json_parsing: bool = True,
+        semantic_analysis_cache: bool = False,
+        semantic_chat_cache: bool = False,
+        disk_cache_path: Optional[str] = None,
+        verify_model: bool = False
+    ):
         """
         Initialize the Gemini service with optional API key.
 
         Args:
             api_key: The Gemini API key. If None, attempts to load from environment.
-            debug_mode: If True, saves all Gemini responses to a debug log file.
+            debug_mode: If True, appends all Gemini responses to a rotating JSONL debug log.
+            structural_cache: If True, reuse analyses of speeches with the same bucketed
+                pace/variation/transition/issue profile instead of calling Gemini.
+            context_cache: If True, store the analysis system instruction with Gemini
+                context caching and reference it from each analysis call.
+            legacy_json_parsing: If True, fall back to repairing the response and extracting
+                JSON from code fences or prose when it is not a bare JSON analysis.
+            semantic_analysis_cache: If True, reuse the analysis of a previous speech whose
+                prompt embedding is nearly identical (costs one embedding call per miss).
+            semantic_chat_cache: If True, reuse answers to paraphrased chat questions about
+                the same speech (costs one embedding call per uncached question, made
+                before the reply starts streaming).
+            disk_cache_path: Optional path of a SQLite database that persists analyses
+                across restarts, keyed by prompt hash.
+            verify_model: If True, make a test call at startup (see health_check). Off by
+                default so constructing the service costs no Gemini round-trip or quota.
         """
+        self.model_name = None
+        self._api_key = api_key or os.environ.get("GEMINI_API_KEY")
+        self._genai_client = None
         self.model = self.init_gemini(api_key)
+        # Set once a real call succeeds; until then failures are reported with setup hints
+        self._verified = False
+        # Speech analysis uses the same model with the static coaching rubric as its
+        # system instruction and a JSON response schema, so each call only sends data
+        self.analysis_model = (
+            self._create_model(
+                self.model_name,
+                system_instruction=ANALYSIS_SYSTEM_INSTRUCTION,
+                generation_config=ANALYSIS_GENERATION_CONFIG
+            )
+            if self.model is not None else None
+        )
+        self.chat_model = (
+            self._create_model(
+                CHAT_MODEL_NAME,
+                system_instruction=CHAT_SYSTEM_INSTRUCTION,
+                generation_config=CHAT_GENERATION_CONFIG
+            )
+            if self.model is not None else None
+        )
+        self.use_context_cache = context_cache
+        self.legacy_json_parsing = legacy_json_parsing
+        self._context_cache = None
+        self._context_cached_model = None
+        self._context_cache_expires_at = 0.0
+        self._context_cache_failed = False
+        self._context_cache_lock = threading.Lock()
         self.debug_mode = debug_mode
+        self.response_cache = ResponseCache(
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+        )
+        # Hit/miss counters for observability
+        self.stats = self.response_cache.stats
+        self.structural_cache = (
+            ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+            if structural_cache else None
+        )
+        self.semantic_cache = (
+            SemanticCache(
+                capacity=SEMANTIC_CACHE_CAPACITY,
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+            )
+            if semantic_chat_cache else None
+        )
+        self.analysis_semantic_cache = (
+            SemanticCache(
+                capacity=SEMANTIC_CACHE_CAPACITY,
+                threshold=ANALYSIS_SEMANTIC_CACHE_THRESHOLD,
+                ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+            )
+            if semantic_analysis_cache else None
+        )
+        self.disk_cache = DiskCache(disk_cache_path) if disk_cache_path else None
 
         # Set up debug log directory
         if self.debug_mode:
             self.debug_log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs', 'gemini_debug')
             os.makedirs(self.debug_log_dir, exist_ok=True)
-            print(f"Debug mode enabled. Logs will be saved to: {self.debug_log_dir}", file=sys.stderr)
+            self._debug_logger = _get_debug_logger(self.debug_log_dir)
+            logger.info("Debug mode enabled. Logs will be saved to: %s", self.debug_log_dir)
 
         # Log init status
         if self.model is None:
-            print("WARNING: Gemini model initialization failed. Analysis will be limited.", file=sys.stderr)
+            logger.warning("Gemini model initialization failed. Analysis will be limited.")
         else:
-            print("Gemini model initialized successfully.")
+            logger.info("Gemini model initialized successfully.")
+            if verify_model:
+                self.health_check()
+    
+    def health_check(self) -> Dict[str, Any]:
+        """
+        Verify that Gemini answers requests by making a minimal test call.
+        
+        Meant for health-check endpoints and deploy scripts; it costs one round-trip.
+        
+        Returns:
+            Dictionary with a status ("available", "error" or "unavailable") and details
+        """
+        if self.model is None:
+            return {
+                "status": "unavailable",
+                "details": {"model_exists": False, "reason": "Model is None - check initialization logs"},
+            }
+        
+        details = {
+            "model_exists": True,
+            "model_name": self.model_name,
+            "has_generate_content": hasattr(self.model, 'generate_content'),
+        }
+        try:
+            response = self.model.generate_content("Test", generation_config=HEALTH_CHECK_GENERATION_CONFIG)
+        except Exception as e:
+            self._log_call_error(e)
+            details["test_call_error"] = str(e)
+            return {"status": "error", "details": details}
+        
+        details["test_call_success"] = True
+        # Don't read response.text: a candidate that stopped before producing any
+        # parts (e.g. at the token cap) raises there, but the model still answered
+        candidates = getattr(response, 'candidates', None) if response else None
+        finish_reason = getattr(candidates[0], 'finish_reason', None) if candidates else None
+        finish_reason = getattr(finish_reason, 'name', finish_reason)
+        details["test_finish_reason"] = str(finish_reason) if finish_reason is not None else None
+        if not finish_reason or finish_reason == "FINISH_REASON_UNSPECIFIED":
+            details["test_call_error"] = "Response has no finished candidate"
+            return {"status": "error", "details": details}
+        
+        self._verified = True
+        logger.info("Gemini health check passed for model %s", self.model_name)
+        return {"status": "available", "details": details}
     
     def init_gemini(self, api_key: Optional[str] = None) -> Any:
         """
@@ -52,37 +603,20 @@ class GeminiService:
             
             # Debug: Check if API key is loaded
             if not API_KEY:
-                print("ERROR: GEMINI_API_KEY not found in environment variables or parameters", file=sys.stderr)
-                print(f"DEBUG: Checking environment - GEMINI_API_KEY in os.environ: {'GEMINI_API_KEY' in os.environ}", file=sys.stderr)
+                logger.error("GEMINI_API_KEY not found in environment variables or parameters")
+                logger.debug("Checking environment - GEMINI_API_KEY in os.environ: %s", 'GEMINI_API_KEY' in os.environ)
                 if 'GEMINI_API_KEY' in os.environ:
                     key_value = os.environ.get("GEMINI_API_KEY")
-                    print(f"DEBUG: GEMINI_API_KEY value length: {len(key_value) if key_value else 0}", file=sys.stderr)
-                    print(f"DEBUG: GEMINI_API_KEY starts with: {key_value[:10] if key_value and len(key_value) > 10 else 'N/A'}...", file=sys.stderr)
+                    logger.debug("GEMINI_API_KEY value length: %d", len(key_value) if key_value else 0)
+                    logger.debug("GEMINI_API_KEY starts with: %s...", key_value[:10] if key_value and len(key_value) > 10 else 'N/A')
                 return None
             else:
-                print(f"DEBUG: GEMINI_API_KEY loaded successfully (length: {len(API_KEY)})", file=sys.stderr)
-                print(f"DEBUG: GEMINI_API_KEY starts with: {API_KEY[:10]}...", file=sys.stderr)
+                logger.debug("GEMINI_API_KEY loaded successfully (length: %d)", len(API_KEY))
+                logger.debug("GEMINI_API_KEY starts with: %s...", API_KEY[:10])
                 
-            # Configure the API client
-            genai.configure(api_key=API_KEY)
-            
-            # Set up the model - NO TOKEN LIMITS
-            # Set max_output_tokens to maximum allowed (64,000 for gemini-3-flash)
-            generation_config = {
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 64000,  # Maximum allowed - NO LIMITS
-            }
-            
-            # Disable all safety filters for speech analysis
-            # BLOCK_NONE allows all content through for analysis purposes
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            # Configure the API client once per process; the SDK keeps one client (and its
+            # connection) per configuration, so reconfiguring would discard the open channel
+            _configure_genai(API_KEY)
             
             # Create the model - use correct model name
             # Try gemini-3-flash-preview first (correct name), fallback to gemini-1.5-flash if needed
@@ -96,53 +630,102 @@ class GeminiService:
             last_error = None
             for model_name in model_names_to_try:
                 try:
-                    print(f"Attempting to initialize model: {model_name}", file=sys.stderr)
-                    model = genai.GenerativeModel(
-                        model_name=model_name,
-                        generation_config=generation_config,
-                        safety_settings=safety_settings
-                    )
-                    print(f"Successfully created model: {model_name}", file=sys.stderr)
+                    logger.info("Attempting to initialize model: %s", model_name)
+                    model = self._create_model(model_name)
+                    self.model_name = model_name
+                    logger.info("Successfully created model: %s", model_name)
                     break
                 except Exception as model_error:
-                    print(f"Failed to create model {model_name}: {str(model_error)}", file=sys.stderr)
+                    logger.warning("Failed to create model %s: %s", model_name, model_error)
                     last_error = model_error
                     continue
             
             if model is None:
                 raise Exception(f"Failed to initialize any Gemini model. Last error: {str(last_error)}")
             
-            # Test the model with a simple call to verify it's actually working
-            try:
-                print("Testing Gemini model with a simple API call...", file=sys.stderr)
-                test_response = model.generate_content("Hello")
-                if not test_response:
-                    raise Exception("Model did not return a response for test call")
-                if not hasattr(test_response, 'text'):
-                    raise Exception("Model response is missing text attribute")
-                if not test_response.text:
-                    raise Exception("Model response text is empty")
-                print(f"Gemini model test successful. Response: {test_response.text[:50]}...", file=sys.stderr)
-            except Exception as test_error:
-                error_msg = str(test_error)
-                print(f"Gemini model test call failed: {error_msg}", file=sys.stderr)
-                # Check for specific error types
-                if "API key" in error_msg or "403" in error_msg or "401" in error_msg:
-                    raise Exception(f"API key authentication failed: {error_msg}. Check that your GEMINI_API_KEY is valid and the Generative Language API is enabled.")
-                elif "404" in error_msg or "not found" in error_msg.lower():
-                    raise Exception(f"Model not found: {error_msg}. The model name may be incorrect or not available in your region.")
-                elif "quota" in error_msg.lower() or "billing" in error_msg.lower():
-                    raise Exception(f"Quota or billing issue: {error_msg}. Check your Google Cloud billing and quotas.")
-                else:
-                    raise Exception(f"Model initialization test failed: {error_msg}")
-                
             return model
         except Exception as e:
-            print(f"Error initializing Gemini: {str(e)}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception("Error initializing Gemini: %s", e)
             return None
     
+    def _log_call_error(self, error: Exception) -> None:
+        """
+        Report a failed Gemini call with setup hints if no call has succeeded yet.
+
+        Args:
+            error: Exception raised by the Gemini SDK
+        """
+        if not self._verified:
+            logger.error("Gemini is not working yet. %s", _describe_gemini_error(error))
+
+    def _create_model(
+        self,
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Create a Gemini model with the shared generation and safety settings.
+
+        Args:
+            model_name: Name of the Gemini model
+            system_instruction: Optional static instruction sent as the model's system prompt
+            generation_config: Optional override for the shared generation settings
+
+        Returns:
+            The Gemini model
+        """
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config or GENERATION_CONFIG,
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=system_instruction
+        )
+
+    def _get_analysis_model(self) -> Any:
+        """
+        Get the model to use for an analysis call.
+        
+        With context caching enabled, returns a model bound to a Gemini cached content
+        holding the static system instruction, creating it on first use and extending
+        its TTL when it is close to expiring. Falls back to the regular analysis model
+        if the cache cannot be created (e.g. the instruction is below the model's
+        minimum cacheable size).
+        
+        Returns:
+            The Gemini model
+        """
+        if not self.use_context_cache or self._context_cache_failed:
+            return self.analysis_model
+        
+        with self._context_cache_lock:
+            now = time.monotonic()
+            if self._context_cached_model is not None and now < self._context_cache_expires_at - CONTEXT_CACHE_REFRESH_MARGIN_SECONDS:
+                return self._context_cached_model
+            
+            try:
+                ttl = timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS)
+                if self._context_cache is None:
+                    self._context_cache = genai.caching.CachedContent.create(
+                        model=self.model_name,
+                        system_instruction=ANALYSIS_SYSTEM_INSTRUCTION,
+                        ttl=ttl
+                    )
+                    self._context_cached_model = genai.GenerativeModel.from_cached_content(
+                        self._context_cache,
+                        generation_config=ANALYSIS_GENERATION_CONFIG,
+                        safety_settings=SAFETY_SETTINGS
+                    )
+                    logger.info("Created Gemini context cache: %s", self._context_cache.name)
+                else:
+                    self._context_cache.update(ttl=ttl)
+                self._context_cache_expires_at = now + CONTEXT_CACHE_TTL_SECONDS
+                return self._context_cached_model
+            except Exception as e:
+                logger.warning("Gemini context caching unavailable, using system instruction instead: %s", e)
+                self._context_cache_failed = True
+                return self.analysis_model
+    
     def generate_speech_analysis_prompt(self, transcription_data: List[Dict[str, Any]]) -> str:
         """
         Generate a formatted prompt for Gemini based on speech analysis.
@@ -153,229 +736,336 @@ class GeminiService:
         Returns:
             Formatted prompt string for Gemini
         """
-        # Create the formatted timeline for reference
-        timeline_blocks = []
+        return self._format_speech_analysis_prompt(self._summarize_speech(transcription_data))
+    
+    def _summarize_speech(self, transcription_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compute the timeline and statistics that the speech analysis prompt is built from.
+        
+        Args:
+            transcription_data: List of transcription segment dictionaries
+            
+        Returns:
+            Dictionary with timeline blocks, flagged issues and WPS/emotion statistics
+        """
         issues = []
+        issue_types = set()
         
-        # Format time helper function
-        def format_time(seconds: float) -> str:
-            minutes = int(seconds // 60)
-            seconds_remainder = int(seconds % 60)
-            return f"{minutes:02d}:{seconds_remainder:02d}"
-        
-        for segment in transcription_data:
-            # Format times
-            start_time = format_time(segment["start"])
-            end_time = format_time(segment["end"])
-            
-            # Create formatted block
-            block = (
-                f"{start_time}-{end_time} | "
-                f"WPS: {segment['wps']:.2f} | "
-                f"Emotion: {segment['emotion']} | "
-                f"Text: \"{segment['text']}\""
+        # Build the timeline, gather WPS values and count emotions and transitions in a single pass
+        time_ranges = []
+        timeline_blocks = []
+        texts = []
+        emotion_counts = Counter()
+        emotion_transitions = 0
+        previous_emotion = None
+        wps = np.empty(len(transcription_data), dtype=np.float64)
+        for i, segment in enumerate(transcription_data):
+            time_range = f"{_format_time(segment['start'])}-{_format_time(segment['end'])}"
+            segment_wps = segment["wps"]
+            emotion = segment["emotion"]
+            time_ranges.append(time_range)
+            timeline_blocks.append(
+                f"{time_range} | WPS: {segment_wps:.2f} | Emotion: {emotion} | Text: \"{segment['text']}\""
             )
-            
-            timeline_blocks.append(block)
-            
-            # Check for issues
-            if segment["wps"] > 3.0:
-                issues.append(f"- Segment at {start_time}-{end_time} is too fast ({segment['wps']:.2f} WPS)")
-            elif segment["wps"] < 1.0:
-                issues.append(f"- Segment at {start_time}-{end_time} is too slow ({segment['wps']:.2f} WPS)")
+            texts.append(str(segment['text']))
+            wps[i] = segment_wps
+            emotion_counts[emotion] += 1
+            if i and emotion != previous_emotion:
+                emotion_transitions += 1
+            previous_emotion = emotion
         
-        # Calculate WPS statistics
-        wps_values = [segment["wps"] for segment in transcription_data]
-        avg_wps = sum(wps_values) / len(wps_values) if wps_values else 0
+        # Calculate WPS statistics over the array instead of repeated Python passes
+        avg_wps = float(wps.mean()) if wps.size else 0.0
         # Calculate standard deviation for variation (more meaningful than range)
         # Typical standard deviation for natural speech is around 0.3-0.7 WPS
-        wps_variation = statistics.stdev(wps_values) if len(wps_values) > 1 else 0
+        wps_variation = float(wps.std(ddof=1)) if wps.size > 1 else 0.0
         
-        # Count emotion transitions
-        emotion_transitions = 0
-        for i in range(1, len(transcription_data)):
-            if transcription_data[i]["emotion"] != transcription_data[i-1]["emotion"]:
-                emotion_transitions += 1
+        # Check for issues, keeping them in timeline order
+        too_fast = wps > 3.0
+        for i in np.flatnonzero(too_fast | (wps < 1.0)).tolist():
+            segment = transcription_data[i]
+            if too_fast[i]:
+                issues.append(f"- Segment at {time_ranges[i]} is too fast ({segment['wps']:.2f} WPS)")
+                issue_types.add("too_fast")
+            else:
+                issues.append(f"- Segment at {time_ranges[i]} is too slow ({segment['wps']:.2f} WPS)")
+                issue_types.add("too_slow")
         
-        # Build the prompt
-        prompt = f"""You are a professional speech coach analyzing speech transcript data. The following is a timeline of speech segments with transcriptions, speaking rate (words per second), and detected emotions:
-
-{chr(10).join(block for block in timeline_blocks)}
-
-Based on this data, provide constructive feedback on:
-
-1. Speaking Rate:
-   - Average speaking rate: {avg_wps:.2f} WPS (optimal is 2.0-3.0 WPS)
-   - Rate variation: {wps_variation:.2f} WPS (higher variation can indicate better engagement)
-   - Specific segments to improve:
-     {chr(10).join(f'     {issue}' for issue in issues) if issues else '     None identified'}
-
-2. Emotional Expression:
-   - Number of emotion transitions: {emotion_transitions}
-   - Evaluate whether the emotions match the content of each segment
-   - Suggest where emotional variety could improve engagement
-
-3. Clarity and Enunciation:
-   - Identify any unclear or nonsensical phrases that suggest poor enunciation. (If words are spoken too fast, or too quietly, or pronounced incorrectly, they may be unclear on the transcription. Please assume that the user's speech is written correctly, and that the transcription looking incorrect is due to the user speaking too fast, or too quietly, or pronounced incorrectly. This is mostly fixed by enunciating more clearly and slowing down.)
-   - Suggest specific techniques to improve clarity
-
-4. Overall Presentation:
-   - Provide 3-5 specific action items to improve this speech
-   - Suggest a practice exercise tailored to this speaker's needs
-
-IMPORTANT: Respond ONLY with valid JSON. Do not include any explanatory text, markdown formatting, or code blocks. Return ONLY the JSON object itself.
-
-Your response must be EXACTLY in this JSON structure:
-{{
-  "summary": "Your overall analysis and key observations",
-  "improvement_areas": ["Area 1", "Area 2", "Area 3"],
-  "strengths": ["Strength 1", "Strength 2"],
-  "coaching_tips": ["Tip 1", "Tip 2", "Tip 3"]
-}}"""
+        dominant_emotion = max(emotion_counts, key=emotion_counts.get) if emotion_counts else "unknown"
         
-        return prompt
+        return {
+            "timeline_blocks": timeline_blocks,
+            "issues": issues,
+            "issue_types": issue_types,
+            "avg_wps": avg_wps,
+            "wps_variation": wps_variation,
+            "emotion_transitions": emotion_transitions,
+            "dominant_emotion": dominant_emotion,
+            "transcript_text": " ".join(texts),
+        }
     
-    def generate_simple_prompt(self, emotion_segments: List[Tuple[str, str]]) -> str:
+    def _format_speech_analysis_prompt(self, summary: Dict[str, Any]) -> str:
         """
-        Generate a simpler prompt when transcription data is not available.
+        Format the speech analysis prompt from a speech summary.
         
         Args:
-            emotion_segments: List of (time_range, emotion) tuples
+            summary: Output of _summarize_speech
             
         Returns:
             Formatted prompt string for Gemini
         """
-        # Format emotion segments for context
-        emotion_timeline = "\n".join([f"{time_range}: {emotion}" for time_range, emotion in emotion_segments])
+        timeline = "\n".join(summary["timeline_blocks"])
+        issues = summary["issues"]
         
-        prompt = f"""You are a professional speech coach helping someone improve their communication skills.
-Analyze the following emotion timeline from a speech:
+        # Build the prompt; the coaching rubric lives in the system instruction
+        prompt = f"""Speech timeline (time range | speaking rate | emotion | transcription):
 
-{emotion_timeline}
-
-Based on this emotional pattern:
-1. Provide a brief summary of the speaker's emotional journey
-2. Identify 3 specific areas for improvement
-3. Point out 2-3 emotional strengths
-4. Give 3-5 practical coaching tips to help the speaker improve
+{timeline}
 
-IMPORTANT: Respond ONLY with valid JSON. Do not include any explanatory text, markdown formatting, or code blocks. Return ONLY the JSON object itself.
+Speaking Rate:
+- Average speaking rate: {summary['avg_wps']:.2f} WPS
+- Rate variation: {summary['wps_variation']:.2f} WPS
+- Specific segments to improve:
+{chr(10).join(f'  {issue}' for issue in issues) if issues else '  None identified'}
 
-Your response must be EXACTLY in this JSON structure:
-{{
-  "summary": "Your overall analysis and key observations",
-  "improvement_areas": ["Area 1", "Area 2", "Area 3"],
-  "strengths": ["Strength 1", "Strength 2"],
-  "coaching_tips": ["Tip 1", "Tip 2", "Tip 3"]
-}}"""
+Emotional Expression:
+- Number of emotion transitions: {summary['emotion_transitions']}"""
+        
+        return prompt
+    
+    def _structural_cache_key(self, summary: Dict[str, Any], namespace: Optional[str]) -> Optional[str]:
+        """
+        Build the structural cache key for a speech summary.
+        
+        Speeches of the same caller with the same bucketed pace, variation, transition
+        count and issue pattern get the same coaching, so they share one key. Speeches
+        whose average pace sits right at a coaching tier boundary always miss, since a
+        small change there flips the advice.
+        
+        Args:
+            summary: Output of _summarize_speech
+            namespace: Caller identity (e.g. user id); templates are never shared across callers
+            
+        Returns:
+            The cache key, or None if the speech must not use the structural cache
+        """
+        if not namespace:
+            return None
+        avg_wps = summary["avg_wps"]
+        if any(abs(avg_wps - boundary) < STRUCTURAL_CACHE_BOUNDARY_MARGIN for boundary in WPS_TIER_BOUNDARIES):
+            return None
+        
+        structure = (
+            round(avg_wps * 4) / 4,
+            round(summary["wps_variation"] * 2) / 2,
+            summary["emotion_transitions"],
+            tuple(sorted(summary["issue_types"])),
+        )
+        return ResponseCache.make_key("structure", namespace, self.model_name, repr(structure))
+    
+    def _to_structural_template(self, analysis: Dict[str, Any], summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Turn an analysis into a reusable template, replacing the dominant emotion with a placeholder.
+        
+        Args:
+            analysis: Parsed analysis from Gemini
+            summary: Output of _summarize_speech for the analyzed speech
+            
+        Returns:
+            The template, or None if the analysis refers to specific moments or words of the speech
+        """
+        serialized = _json_dumps(analysis)
+        # Timestamps tie the advice to this particular timeline; don't reuse it
+        if _TIMESTAMP_RE.search(serialized):
+            return None
+        # Neither may quotes or paraphrases of what the speaker said
+        transcript_ngrams = _word_ngrams(summary["transcript_text"], STRUCTURAL_CACHE_NGRAM_WORDS)
+        for text in _iter_strings(analysis):
+            if _QUOTED_SPAN_RE.search(text) or not transcript_ngrams.isdisjoint(
+                _word_ngrams(text, STRUCTURAL_CACHE_NGRAM_WORDS)
+            ):
+                return None
+        return _json_loads(_word_re(summary["dominant_emotion"]).sub(DOMINANT_EMOTION_PLACEHOLDER, serialized))
+    
+    def _from_structural_template(self, template: Dict[str, Any], dominant_emotion: str) -> Dict[str, Any]:
+        """
+        Fill a structural template with the dominant emotion of the current speech.
+        
+        Args:
+            template: Template produced by _to_structural_template
+            dominant_emotion: Dominant emotion of the current speech
+            
+        Returns:
+            The analysis dictionary
+        """
+        serialized = _json_dumps(template).replace(DOMINANT_EMOTION_PLACEHOLDER, _json_dumps(dominant_emotion)[1:-1])
+        return _json_loads(serialized)
+    
+    def generate_simple_prompt(self, emotion_segments: List[Tuple[str, str]]) -> str:
+        """
+        Generate a simpler prompt when transcription data is not available.
+        
+        Args:
+            emotion_segments: List of (time_range, emotion) tuples
+            
+        Returns:
+            Formatted prompt string for Gemini
+        """
+        # Format emotion segments for context
+        emotion_timeline = "\n".join([f"{time_range}: {emotion}" for time_range, emotion in emotion_segments])
+        
+        prompt = f"""Emotion timeline (no transcription available):
+
+{emotion_timeline}"""
         
         return prompt
     
     def _save_debug_log(self, response_text: str, prompt: str, success: bool, error_msg: Optional[str] = None):
         """
-        Save a debug log of the Gemini response for troubleshooting.
+        Append a debug record of the Gemini response to the rotating JSONL log.
         """
         if not self.debug_mode:
             return
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        status = "SUCCESS" if success else "FAILED"
-        filename = f"gemini_response_{status}_{timestamp}.txt"
-        filepath = os.path.join(self.debug_log_dir, filename)
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "status": "SUCCESS" if success else "FAILED",
+            "prompt": prompt,
+            "response": response_text,
+            "response_length": len(response_text),
+            "error": error_msg,
+        }
 
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("=" * 80 + "\n")
-                f.write(f"GEMINI DEBUG LOG - {status}\n")
-                f.write(f"Timestamp: {datetime.now().isoformat()}\n")
-                f.write("=" * 80 + "\n\n")
-
-                f.write("PROMPT SENT:\n")
-                f.write("-" * 80 + "\n")
-                f.write(prompt + "\n")
-                f.write("-" * 80 + "\n\n")
-
-                f.write("RAW RESPONSE:\n")
-                f.write("-" * 80 + "\n")
-                f.write(response_text + "\n")
-                f.write("-" * 80 + "\n\n")
-
-                if error_msg:
-                    f.write("ERROR MESSAGE:\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(error_msg + "\n")
-                    f.write("-" * 80 + "\n\n")
-
-                f.write(f"Response length: {len(response_text)} characters\n")
-
-            print(f"Debug log saved to: {filepath}", file=sys.stderr)
+            self._debug_logger.info(record)
         except Exception as e:
-            print(f"Failed to save debug log: {str(e)}", file=sys.stderr)
+            logger.warning("Failed to save debug log: %s", e)
 
     def _extract_json_from_response(self, response_text: str, emotion_segments: List[Tuple[str, str]], prompt: str = "") -> Dict[str, Any]:
         """
         Extract JSON from Gemini response text with robust error handling.
+        Falls back to a basic analysis when no valid JSON can be extracted.
+        """
+        result = self._parse_analysis_json(response_text, prompt)
+        if result is None:
+            return self.generate_fallback_analysis(emotion_segments)
+        return result
+
+    def _parse_analysis_json(self, response_text: str, prompt: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Parse the analysis JSON object out of a Gemini response.
+
+        Args:
+            response_text: Raw response text from Gemini
+            prompt: The prompt that produced the response (for the debug log)
+
+        Returns:
+            The parsed analysis dictionary, or None if no valid JSON was found
+        """
+        # Fast path: analyses are requested as schema-constrained JSON
+        try:
+            result = _json_loads(response_text)
+            if self._is_analysis(result):
+                logger.info("Successfully parsed JSON directly")
+                self._save_debug_log(response_text, prompt, success=True)
+                return result
+        except ValueError:
+            pass
+
+        if self.legacy_json_parsing:
+            result = self._parse_legacy_analysis_json(response_text)
+            if result is not None:
+                self._save_debug_log(response_text, prompt, success=True)
+                return result
+
+        # If all strategies fail, use fallback
+        error_msg = "Failed to parse JSON from Gemini response after trying all strategies."
+        logger.warning(error_msg)
+        logger.warning("Response text (first 500 chars): %s", response_text[:500])
+        logger.warning("Response text length: %d", len(response_text))
+        self._save_debug_log(response_text, prompt, success=False, error_msg=error_msg)
+        return None
+
+    def _parse_legacy_analysis_json(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract an analysis from a response that is not bare JSON.
+
+        Tries the text with any code fence stripped first. Otherwise repairs a missing
+        closing bracket, then returns the first well-formed object with all analysis
+        fields found in a code fence or surrounding prose.
+
+        Args:
+            response_text: Raw response text from Gemini
+
+        Returns:
+            The parsed analysis dictionary, or None if no valid JSON was found
         """
         # Clean the response text
         cleaned_text = response_text.strip()
 
+        # Fast path: a well-formed object that is only wrapped in a code fence needs
+        # no repair or scanning
+        unfenced = cleaned_text.strip('`')
+        if unfenced.startswith('json'):
+            unfenced = unfenced[4:]
+        unfenced = unfenced.strip()
+        if unfenced[:1] == '{' and unfenced[-1:] == '}':
+            try:
+                result = _json_loads(unfenced)
+                if self._is_analysis(result):
+                    logger.info("Successfully parsed fenced JSON directly")
+                    return result
+            except ValueError:
+                pass
+
         # Try to repair common JSON malformations
         repaired_text = cleaned_text
         if repaired_text.endswith('"}') and not repaired_text.endswith('"]}'):
+            # str.count is a single C-level scan; only scan for ']' when there is a '[' to balance
             open_brackets = repaired_text.count('[')
-            close_brackets = repaired_text.count(']')
-            if open_brackets > close_brackets:
+            if open_brackets and open_brackets > repaired_text.count(']'):
                 repaired_text = repaired_text[:-1] + '"]}'
-                print("Attempted to repair malformed JSON by adding missing ]", file=sys.stderr)
-
-        # Try multiple extraction strategies
-        extraction_strategies = [
-            lambda text: json.loads(text),
-            lambda text: json.loads(text.strip()),
-            lambda text: json.loads(re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL).group(1)),
-            lambda text: json.loads(re.search(r'```\s*(.*?)\s*```', text, re.DOTALL).group(1)),
-            lambda text: json.loads(re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, re.DOTALL).group(0)),
-            lambda text: json.loads(re.search(r'\{.*\}', text, re.DOTALL).group(0)),
-        ]
+                logger.info("Attempted to repair malformed JSON by adding missing ]")
 
-        for i, strategy in enumerate(extraction_strategies):
-            try:
-                result = strategy(repaired_text)
-                if isinstance(result, dict) and all(key in result for key in ["summary", "improvement_areas", "strengths", "coaching_tips"]):
-                    print(f"Successfully parsed JSON using strategy {i+1}", file=sys.stderr)
-                    self._save_debug_log(response_text, prompt, success=True)
-                    return result
-            except (json.JSONDecodeError, AttributeError, TypeError, KeyError) as e:
-                continue
+        # Strip a code fence once, then walk the text from each '{' with a single
+        # raw_decode per candidate, falling back to the whole text if the fence held nothing
+        fence_match = _JSON_FENCE_RE.search(repaired_text) or _FENCE_RE.search(repaired_text)
+        texts = [fence_match.group(1), repaired_text] if fence_match else [repaired_text]
+        for text in texts:
+            start = text.find('{')
+            while start != -1:
+                try:
+                    result, _ = _JSON_DECODER.raw_decode(text, start)
+                    if self._is_analysis(result):
+                        logger.info("Successfully parsed JSON starting at offset %d", start)
+                        return result
+                except ValueError:
+                    pass
+                start = text.find('{', start + 1)
+        return None
 
-        # If all strategies fail, use fallback
-        error_msg = "Failed to parse JSON from Gemini response after trying all strategies."
-        print(error_msg, file=sys.stderr)
-        print(f"Response text (first 500 chars): {response_text[:500]}", file=sys.stderr)
-        print(f"Response text length: {len(response_text)}", file=sys.stderr)
-        self._save_debug_log(response_text, prompt, success=False, error_msg=error_msg)
-        return self.generate_fallback_analysis(emotion_segments)
+    @classmethod
+    def _is_analysis(cls, result: Any) -> bool:
+        """Check that a parsed object has all the fields of an analysis."""
+        return isinstance(result, dict) and cls._REQUIRED.issubset(result.keys())
 
     def generate_fallback_analysis(self, emotion_segments: List[Tuple[str, str]]) -> Dict[str, Any]:
         """
         Generate a fallback analysis when Gemini is not available.
         """
-        # Count emotions
+        # Count emotions and transitions in a single pass
         emotion_counts = {}
-        for _, emotion in emotion_segments:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        # Find dominant emotion
-        dominant_emotion = max(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else "unknown"
-        
-        # Count transitions
         transitions = 0
         prev_emotion = None
         for _, emotion in emotion_segments:
-            if prev_emotion and prev_emotion != emotion:
+            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+            if prev_emotion is not None and prev_emotion != emotion:
                 transitions += 1
             prev_emotion = emotion
         
+        # Find dominant emotion
+        dominant_emotion = max(emotion_counts, key=emotion_counts.get) if emotion_counts else "unknown"
+        
         # Basic analysis
         analysis = {
             "summary": "Based on the emotion patterns detected in your speech, here are some basic observations and suggestions for improvement.",
@@ -399,116 +1089,622 @@ Your response must be EXACTLY in this JSON structure:
         
         return analysis
     
+    def _build_analysis_prompt(
+        self,
+        emotion_segments: List[Tuple[str, str]],
+        transcription_data: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Build the analysis prompt appropriate for the available data.
+        
+        Returns:
+            Tuple of (speech summary or None when there is no transcription, prompt)
+        """
+        if transcription_data:
+            summary = self._summarize_speech(transcription_data)
+            return summary, self._format_speech_analysis_prompt(summary)
+        return None, self.generate_simple_prompt(emotion_segments)
+    
     def analyze_speech(
         self, 
         emotion_segments: List[Tuple[str, str]], 
-        transcription_data: Optional[List[Dict[str, Any]]] = None
+        transcription_data: Optional[List[Dict[str, Any]]] = None,
+        mode: str = "interactive",
+        namespace: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Use Gemini to analyze speech patterns and provide coaching feedback.
+        
+        Args:
+            emotion_segments: List of (time_range, emotion) tuples
+            transcription_data: Optional list of transcription segment dictionaries
+            mode: "interactive" for a synchronous call, or "batch" to submit through the
+                Gemini Batch API (cheaper, but completes in minutes to hours)
+            namespace: Optional caller identity (e.g. user id) used to partition the
+                structural cache; without it the structural cache is skipped
         """
-        if self.model is None:
-            print("Using fallback analysis because Gemini model is not available", file=sys.stderr)
+        if self.analysis_model is None:
+            logger.warning("Using fallback analysis because Gemini model is not available")
             return self.generate_fallback_analysis(emotion_segments)
         
-        # Generate appropriate prompt based on available data
-        if transcription_data:
-            prompt = self.generate_speech_analysis_prompt(transcription_data)
-        else:
-            prompt = self.generate_simple_prompt(emotion_segments)
+        if mode == "batch":
+            return self.analyze_speech_batch([(emotion_segments, transcription_data, namespace)])[0]
+        
+        summary, prompt = self._build_analysis_prompt(emotion_segments, transcription_data)
+        cache_key, structural_key, cached = self._get_cached_analysis(summary, prompt, namespace)
+        if cached is not None:
+            return cached
+        prompt_embedding, cached = self._get_semantic_analysis(prompt)
+        if cached is not None:
+            return cached
         
         try:
             # Verify model is still available before making the call
-            if self.model is None:
+            if self.analysis_model is None:
                 raise Exception("Gemini model is None - cannot generate content")
-            if not hasattr(self.model, 'generate_content'):
+            if not hasattr(self.analysis_model, 'generate_content'):
                 raise Exception("Gemini model missing generate_content method")
             
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
-            if not response:
-                raise Exception("Gemini returned None response")
-            if not hasattr(response, 'text'):
-                raise Exception("Gemini response missing text attribute")
-            response_text = response.text
-
-            # Extract JSON data from response
-            analysis_data = self._extract_json_from_response(response_text, emotion_segments, prompt)
-
-            return analysis_data
+            # Stream the response from Gemini, stopping once the JSON object is complete
+            response_text = self._stream_analysis_text(prompt)
+            return self._handle_analysis_response(
+                response_text, emotion_segments, prompt, summary, cache_key, structural_key,
+                prompt_embedding
+            )
             
         except Exception as e:
-            print(f"Error during Gemini analysis: {str(e)}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            self._log_call_error(e)
+            logger.exception("Error during Gemini analysis: %s", e)
             return self.generate_fallback_analysis(emotion_segments)
+    
+    async def analyze_speech_async(
+        self,
+        emotion_segments: List[Tuple[str, str]],
+        transcription_data: Optional[List[Dict[str, Any]]] = None,
+        namespace: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of analyze_speech that awaits the Gemini call instead of blocking a thread.
+        
+        Calls go through the google-genai async client, so many analyses can be in
+        flight on one event loop.
+        
+        Args:
+            emotion_segments: List of (time_range, emotion) tuples
+            transcription_data: Optional list of transcription segment dictionaries
+            namespace: Optional caller identity used to partition the structural cache
             
-    def generate_chat_response(self, user_input: str, emotion_context: str) -> str:
+        Returns:
+            Dictionary with the analysis results
         """
-        Generate a chat response for the AI coach feature.
+        if self.analysis_model is None:
+            logger.warning("Using fallback analysis because Gemini model is not available")
+            return self.generate_fallback_analysis(emotion_segments)
+        
+        summary, prompt = self._build_analysis_prompt(emotion_segments, transcription_data)
+        cache_key, structural_key, cached = self._get_cached_analysis(summary, prompt, namespace)
+        if cached is not None:
+            return cached
+        prompt_embedding, cached = await asyncio.to_thread(self._get_semantic_analysis, prompt)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self._generate_analysis_async(prompt)
+            response_text = self._response_text(response)
+            if self._is_truncated(response):
+                response_text += await self._continue_truncated_async(response_text)
+            return self._handle_analysis_response(
+                response_text, emotion_segments, prompt, summary, cache_key, structural_key,
+                prompt_embedding
+            )
+        except Exception as e:
+            self._log_call_error(e)
+            logger.exception("Error during Gemini analysis: %s", e)
+            return self.generate_fallback_analysis(emotion_segments)
+    
+    async def _generate_analysis_async(self, prompt: str) -> Any:
         """
-        if not self.model:
-            return "I'm currently limited to basic responses as my AI analysis capabilities are offline. Here are some general tips: speak at a moderate pace (2-3 words per second), practice with recordings to improve tone, and join speaking clubs for regular feedback."
+        Request an analysis through the google-genai async client.
+        
+        Uses the same generation settings, safety settings and system instruction (or
+        context cache) as the synchronous analysis model.
+        
+        Args:
+            prompt: Analysis prompt
             
-        # Create prompt for Gemini matching Voice Agent style
-        prompt = f"""# Role
-You are an expert speech coach helping someone improve their public speaking. You just analyzed their speech and now you're having a text conversation with them to provide personalized coaching.
-
-# General Guidelines
-- Be warm, encouraging, and supportive—but also honest about areas to improve
-- Write clearly and naturally in plain language
-- Keep responses concise (2-4 sentences) unless they ask for details
-- Do not use markdown formatting like code blocks, quotes, bold, links, or italics
-- Use line breaks in lists if needed
-- Use varied phrasing; avoid repetition
-- If unclear what they're asking, ask for clarification
-- If asked about your well-being, respond briefly and kindly
+        Returns:
+            The google-genai response
+        """
+        config = {**ANALYSIS_GENERATION_CONFIG, "safety_settings": SAFETY_SETTINGS}
+        # Creating or refreshing the context cache is a blocking call
+        if self.use_context_cache and await asyncio.to_thread(self._get_analysis_model) is self._context_cached_model:
+            config["cached_content"] = self._context_cache.name
+        else:
+            config["system_instruction"] = ANALYSIS_SYSTEM_INSTRUCTION
+        
+        return await self._get_genai_client().aio.models.generate_content(
+            model=self.model_name,
+            contents=prompt,
+            config=genai_types.GenerateContentConfig(**config)
+        )
+    
+    async def analyze_many(
+        self,
+        jobs: List[Tuple[List[Tuple[str, str]], Optional[List[Dict[str, Any]]]]],
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several speeches concurrently, overlapping their Gemini round-trips.
+        
+        Args:
+            jobs: List of (emotion_segments, transcription_data) tuples, optionally with
+                a namespace (caller identity) as a third element
+            max_concurrency: Maximum number of requests in flight, to stay within rate limits
+            
+        Returns:
+            One analysis dictionary per job, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(job):
+            async with semaphore:
+                return await self.analyze_speech_async(*job)
+        
+        return await asyncio.gather(*(run(job) for job in jobs))
+    
+    def _get_cached_analysis(
+        self,
+        summary: Optional[Dict[str, Any]],
+        prompt: str,
+        namespace: Optional[str] = None
+    ) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Look up an analysis in the exact-match and structural caches.
+        
+        The structural cache is only consulted for a caller namespace, since its
+        templates are keyed on coarse statistics rather than the speech itself.
+        
+        Returns:
+            Tuple of (exact cache key, structural cache key or None, cached analysis or None)
+        """
+        # Identical prompts get identical analyses; skip the API round-trip on a hit
+        cache_key = ResponseCache.make_key("analysis", self.model_name, prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached Gemini analysis")
+            return cache_key, None, copy.deepcopy(cached)
+        if self.disk_cache is not None:
+            try:
+                cached = self.disk_cache.get(cache_key)
+            except Exception as e:
+                logger.warning("Disk cache lookup failed: %s", e)
+                cached = None
+            if cached is not None:
+                logger.info("Using disk-cached Gemini analysis")
+                self.response_cache.set(cache_key, cached)
+                return cache_key, None, copy.deepcopy(cached)
+        
+        structural_key = None
+        if self.structural_cache is not None and summary is not None:
+            structural_key = self._structural_cache_key(summary, namespace)
+            template = self.structural_cache.get(structural_key) if structural_key else None
+            if template is not None:
+                logger.info("Using structurally cached Gemini analysis")
+                return cache_key, structural_key, self._from_structural_template(template, summary["dominant_emotion"])
+        
+        return cache_key, structural_key, None
+    
+    def _get_semantic_analysis(self, prompt: str) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+        """
+        Look up an analysis of a near-identical prompt in the semantic analysis cache.
+        
+        Returns:
+            Tuple of (prompt embedding to store the new analysis under or None, cached analysis or None)
+        """
+        if self.analysis_semantic_cache is None:
+            return None, None
+        
+        prompt_embedding = self._embed_text(prompt)
+        if prompt_embedding is None:
+            return None, None
+        cached = self.analysis_semantic_cache.get(self.model_name, prompt_embedding)
+        if cached is not None:
+            logger.info("Using semantically cached Gemini analysis")
+            return prompt_embedding, copy.deepcopy(cached)
+        return prompt_embedding, None
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get hit/miss counters for each response cache.
+        
+        Returns:
+            Dictionary mapping cache name to its counters; disabled caches are omitted
+        """
+        caches = {
+            "response": self.response_cache,
+            "structural": self.structural_cache,
+            "chat_semantic": self.semantic_cache,
+            "analysis_semantic": self.analysis_semantic_cache,
+            "disk": self.disk_cache,
+        }
+        return {name: cache.get_stats() for name, cache in caches.items() if cache is not None}
+    
+    def _response_text(self, response: Any) -> str:
+        """
+        Get the text of a Gemini analysis response.
+        
+        Args:
+            response: Response from generate_content
+            
+        Returns:
+            The response text
+        """
+        if not response:
+            raise Exception("Gemini returned None response")
+        if not hasattr(response, 'text'):
+            raise Exception("Gemini response missing text attribute")
+        self._verified = True
+        return response.text
+    
+    def _stream_analysis_text(self, prompt: str) -> str:
+        """
+        Stream an analysis from Gemini and return its text.
+        
+        The response is schema-constrained JSON with nothing after it, so the stream is
+        read to the end; streaming only lets the text arrive while it is generated.
+        
+        Args:
+            prompt: Analysis prompt
+            
+        Returns:
+            The response text, continued if Gemini hit the output token limit
+        """
+        response = self._get_analysis_model().generate_content(prompt, stream=True)
+        chunks = []
+        chunk = None
+        for chunk in response:
+            if chunk.parts:
+                chunks.append(chunk.text)
+        
+        if chunk is None:
+            raise Exception("Gemini returned None response")
+        self._verified = True
+        response_text = "".join(chunks)
+        if self._is_truncated(chunk):
+            response_text += self._continue_truncated(response_text)
+        return response_text
+    
+    @staticmethod
+    def _is_truncated(response: Any) -> bool:
+        """Check whether a response stopped because it hit the output token limit."""
+        candidates = getattr(response, 'candidates', None)
+        if not candidates:
+            return False
+        finish_reason = getattr(candidates[0], 'finish_reason', None)
+        return "MAX_TOKENS" in str(getattr(finish_reason, 'name', finish_reason))
+    
+    def _continue_truncated(self, response_text: str) -> str:
+        """
+        Ask Gemini for the rest of a truncated analysis.
+        
+        Args:
+            response_text: The truncated response text
+            
+        Returns:
+            The missing suffix, or an empty string if the continuation call fails
+        """
+        logger.warning("Gemini analysis hit the output token limit; requesting the remainder")
+        try:
+            return self.model.generate_content(CONTINUATION_PROMPT.format(partial=response_text)).text
+        except Exception as e:
+            logger.warning("Continuation of truncated analysis failed: %s", e)
+            return ""
+    
+    async def _continue_truncated_async(self, response_text: str) -> str:
+        """Async variant of _continue_truncated."""
+        logger.warning("Gemini analysis hit the output token limit; requesting the remainder")
+        try:
+            response = await self._get_genai_client().aio.models.generate_content(
+                model=self.model_name,
+                contents=CONTINUATION_PROMPT.format(partial=response_text),
+                config=genai_types.GenerateContentConfig(**GENERATION_CONFIG, safety_settings=SAFETY_SETTINGS)
+            )
+            return response.text or ""
+        except Exception as e:
+            logger.warning("Continuation of truncated analysis failed: %s", e)
+            return ""
+    
+    def _handle_analysis_response(
+        self,
+        response_text: str,
+        emotion_segments: List[Tuple[str, str]],
+        prompt: str,
+        summary: Optional[Dict[str, Any]],
+        cache_key: str,
+        structural_key: Optional[str],
+        prompt_embedding: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a Gemini analysis response and populate the caches.
+        
+        Returns:
+            The parsed analysis, or the fallback analysis if parsing fails
+        """
+        # Extract JSON data from response
+        analysis_data = self._parse_analysis_json(response_text, prompt)
+        if analysis_data is None:
+            return self.generate_fallback_analysis(emotion_segments)
 
-# Style
-- Use active listening cues like "I noticed" or "I saw that"
-- Be warm and understanding, but concise
-- Use simple words unless they use technical terms
-- Celebrate their strengths before discussing improvements
-- Reference specific moments from their speech when relevant
+        # Only successfully parsed analyses are cached
+        self.response_cache.set(cache_key, analysis_data)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(cache_key, analysis_data)
+            except Exception as e:
+                logger.warning("Failed to persist analysis to the disk cache: %s", e)
+        if structural_key:
+            template = self._to_structural_template(analysis_data, summary)
+            if template is not None:
+                self.structural_cache.set(structural_key, template)
+        if prompt_embedding is not None:
+            self.analysis_semantic_cache.set(self.model_name, prompt_embedding, analysis_data)
+        return copy.deepcopy(analysis_data)
+            
+    def analyze_speech_batch(
+        self,
+        jobs: List[Tuple[List[Tuple[str, str]], Optional[List[Dict[str, Any]]]]],
+        poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many speeches through the Gemini Batch API.
+        
+        Intended for non-interactive work (bulk re-analysis, report generation): all
+        prompts are uploaded as one JSONL file and processed at the batch rate. Jobs
+        answered by the analysis caches are not submitted, and identical prompts are
+        submitted once.
+        
+        Args:
+            jobs: List of (emotion_segments, transcription_data) tuples, optionally with
+                a namespace (caller identity) as a third element
+            poll_interval: Seconds between batch status checks
+            timeout: Optional maximum number of seconds to wait for the batch
+            
+        Returns:
+            One analysis dictionary per job, in input order. Jobs that fail fall back
+            to the basic analysis.
+        """
+        if not jobs:
+            return []
+        
+        # Filled as results arrive; jobs left empty get the fallback analysis at the end
+        results = [None] * len(jobs)
+        if self.analysis_model is None or not self._api_key:
+            logger.warning("Using fallback analysis because Gemini model is not available")
+            return self._with_fallbacks(jobs, results)
+        
+        pending = {}
+        for index, (emotion_segments, transcription_data, *namespace) in enumerate(jobs):
+            summary, prompt = self._build_analysis_prompt(emotion_segments, transcription_data)
+            cache_key, structural_key, cached = self._get_cached_analysis(summary, prompt, *namespace)
+            if cached is not None:
+                results[index] = cached
+                continue
+            if prompt in pending:
+                pending[prompt]["indices"].append(index)
+            else:
+                pending[prompt] = {
+                    "indices": [index],
+                    "summary": summary,
+                    "cache_key": cache_key,
+                    "structural_key": structural_key,
+                }
+        if not pending:
+            return results
+        
+        prompts = list(pending)
+        try:
+            client = self._get_genai_client()
+            
+            # Each line carries the full request, including the static system instruction
+            with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+                for i, prompt in enumerate(prompts):
+                    f.write(_json_dumps({
+                        "key": str(i),
+                        "request": {
+                            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                            "system_instruction": {"parts": [{"text": ANALYSIS_SYSTEM_INSTRUCTION}]},
+                            "generation_config": ANALYSIS_GENERATION_CONFIG,
+                            "safety_settings": SAFETY_SETTINGS,
+                        },
+                    }) + "\n")
+                requests_path = f.name
+            try:
+                uploaded = client.files.upload(
+                    file=requests_path,
+                    config=genai_types.UploadFileConfig(mime_type='jsonl')
+                )
+            finally:
+                os.remove(requests_path)
+            
+            batch_job = client.batches.create(model=self.model_name, src=uploaded.name)
+            logger.info("Submitted Gemini batch %s with %d request(s)", batch_job.name, len(prompts))
+            
+            started = time.monotonic()
+            while batch_job.state.name not in BATCH_TERMINAL_STATES:
+                if timeout is not None and time.monotonic() - started > timeout:
+                    raise TimeoutError(f"Gemini batch {batch_job.name} did not finish within {timeout}s")
+                time.sleep(poll_interval)
+                batch_job = client.batches.get(name=batch_job.name)
+            
+            if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+                raise Exception(f"Gemini batch {batch_job.name} ended in state {batch_job.state.name}")
+            
+            output = client.files.download(file=batch_job.dest.file_name).decode('utf-8')
+        except Exception as e:
+            logger.exception("Error during Gemini batch analysis: %s", e)
+            return self._with_fallbacks(jobs, results)
+        
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = _json_loads(line)
+                index = int(record["key"])
+                if not 0 <= index < len(prompts):
+                    raise IndexError(f"batch result key {index} out of range")
+                response_text = record["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                logger.warning("Skipping malformed batch result line: %s", e)
+                continue
+            
+            job = pending[prompts[index]]
+            first = job["indices"][0]
+            analysis_data = self._handle_analysis_response(
+                response_text, jobs[first][0], prompts[index], job["summary"],
+                job["cache_key"], job["structural_key"]
+            )
+            for job_index in job["indices"]:
+                results[job_index] = copy.deepcopy(analysis_data) if job_index != first else analysis_data
+        
+        return self._with_fallbacks(jobs, results)
+    
+    def _with_fallbacks(
+        self,
+        jobs: List[Tuple[List[Tuple[str, str]], Optional[List[Dict[str, Any]]]]],
+        results: List[Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fill in the fallback analysis for batch jobs that got no result.
+        
+        Returns:
+            The results, with each missing entry replaced by its job's fallback analysis
+        """
+        return [
+            result if result is not None else self.generate_fallback_analysis(job[0])
+            for job, result in zip(jobs, results)
+        ]
+    
+    def _get_genai_client(self) -> Any:
+        """
+        Get the google-genai client used for Batch API and async calls, creating it on first use.
+        
+        The client is shared so its HTTP connection pools are reused across calls.
+        
+        Returns:
+            The google-genai client
+        """
+        if self._genai_client is None:
+            self._genai_client = google_genai.Client(api_key=self._api_key)
+        return self._genai_client
+    
+    def generate_chat_response(self, user_input: str, emotion_context: str, namespace: Optional[str] = None) -> str:
+        """
+        Generate a chat response for the AI coach feature.
 
-# Conversation Flow
-- Your primary goal is to help them understand their performance and improve
-- This may include:
-  - Specific feedback on pacing, emotions, or clarity
-  - Tips for particular moments in their speech
-  - Exercises to practice
-  - Explanations of their metrics
-  - Encouragement and next steps
+        Args:
+            user_input: The user's question
+            emotion_context: Formatted emotion timeline of the analyzed speech
+            namespace: Optional caller identity (e.g. user id) used to partition the semantic cache
+        """
+        return "".join(self.generate_chat_response_stream(user_input, emotion_context, namespace)).strip()
+    
+    def generate_chat_response_stream(
+        self,
+        user_input: str,
+        emotion_context: str,
+        namespace: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Generate a chat response for the AI coach feature, yielding text as Gemini produces it.
+        
+        Cached answers and fallback messages are yielded as a single chunk.
 
-# Their Speech Data
+        Args:
+            user_input: The user's question
+            emotion_context: Formatted emotion timeline of the analyzed speech
+            namespace: Optional caller identity (e.g. user id) used to partition the semantic cache
+            
+        Yields:
+            Chunks of the response text
+        """
+        if not self.chat_model:
+            yield "I'm currently limited to basic responses as my AI analysis capabilities are offline. Here are some general tips: speak at a moderate pace (2-3 words per second), practice with recordings to improve tone, and join speaking clubs for regular feedback."
+            return
+            
+        # Only the speech data and question are sent; the coaching persona lives in
+        # the chat model's system instruction
+        prompt = f"""# Their Speech Data
 Here's what you know about their performance:
 
 EMOTION PATTERN:
 {emotion_context if emotion_context else "No emotion data available"}
 
-# How to Reference Their Speech
-- Use natural time references: "around one minute in" not "at 1:23"
-- Cite specific phrases they said when relevant
-- Connect feedback to exact moments when possible
-- Point out patterns you notice in their emotional expression
-
-# Off-Scope Questions
-If they ask about things outside speech coaching (health issues, unrelated topics):
-"I'm focused on speech coaching, but I'm happy to help with anything related to your presentation skills"
-
 # The User's Question
-The user is asking: "{user_input}"
-
-Remember: Be conversational, specific, and encouraging. Reference their actual performance data when giving feedback. Keep your response in plain text without any markdown formatting."""
+The user is asking: "{user_input}\""""
+        
+        cache_key = ResponseCache.make_key("chat", CHAT_MODEL_NAME, prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
         
+        # Paraphrased questions about the same speech get the same answer. Only the
+        # question is embedded; the speech context and caller are part of the namespace
+        # so answers never cross between speeches or users.
+        question_embedding = None
+        if self.semantic_cache is not None:
+            semantic_namespace = ResponseCache.make_key(namespace or "", emotion_context or "")
+            question_embedding = self._embed_text(user_input)
+        if question_embedding is not None:
+            cached = self.semantic_cache.get(semantic_namespace, question_embedding)
+            if cached is not None:
+                logger.info("Using semantically cached chat response")
+                yield cached
+                return
+        
+        chunks = []
         try:
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            # Stream the response from Gemini so the first words reach the user early
+            response = self.chat_model.generate_content(prompt, stream=True, request_options=CHAT_REQUEST_OPTIONS)
+            for chunk in response:
+                if not chunk.parts:
+                    continue
+                chunks.append(chunk.text)
+                yield chunk.text
+            self._verified = True
         except Exception as e:
-            print(f"Error generating chat response: {str(e)}", file=sys.stderr)
-            return "I'm having trouble generating a personalized response right now. Here's some general advice: focus on maintaining a consistent pace, practice in front of a mirror to work on your delivery, and record yourself to identify specific areas for improvement."
+            self._log_call_error(e)
+            logger.warning("Error generating chat response: %s", e)
+            if not chunks:
+                yield "I'm having trouble generating a personalized response right now. Here's some general advice: focus on maintaining a consistent pace, practice in front of a mirror to work on your delivery, and record yourself to identify specific areas for improvement."
+            return
+        
+        response_text = "".join(chunks).strip()
+        self.response_cache.set(cache_key, response_text)
+        if question_embedding is not None:
+            self.semantic_cache.set(semantic_namespace, question_embedding, response_text)
     
+    def _embed_text(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text for semantic cache lookups.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            The embedding vector, or None if embedding is unavailable
+        """
+        try:
+            result = genai.embed_content(
+                model=EMBEDDING_MODEL_NAME, content=text, request_options=EMBEDDING_REQUEST_OPTIONS
+            )
+            return result["embedding"]
+        except Exception as e:
+            logger.warning("Failed to embed text for semantic cache: %s", e)
+            return None
+
     def analyze_conversation(self, transcript: list) -> dict:
         """
         Analyze a practice conversation for conversational skills.
@@ -520,7 +1716,7 @@ Remember: Be conversational, specific, and encouraging. Reference their actual p
             Dictionary with analysis results
         """
         if not self.model:
-            print("Gemini model not initialized")
+            logger.warning("Gemini model not initialized")
             return self._get_fallback_conversation_analysis()
         
         try:
@@ -571,12 +1767,11 @@ Be encouraging but honest. Provide actionable improvement areas."""
             response_text = response.text.strip()
             
             # Extract JSON from markdown code blocks if present
-            if '```json' in response_text:
-                response_text = response_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in response_text:
-                response_text = response_text.split('```')[1].split('```')[0].strip()
+            fence_match = _JSON_FENCE_RE.search(response_text) or _FENCE_RE.search(response_text)
+            if fence_match:
+                response_text = fence_match.group(1)
             
-            analysis = json.loads(response_text)
+            analysis = _json_loads(response_text)
             
             # Add filler word data
             analysis['filler_word_count'] = total_fillers
@@ -586,9 +1781,7 @@ Be encouraging but honest. Provide actionable improvement areas."""
             return analysis
             
         except Exception as e:
-            print(f"Error analyzing conversation: {str(e)}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception("Error analyzing conversation: %s", e)
             return self._get_fallback_conversation_analysis()
 
     def _get_fallback_conversation_analysis(self) -> dict:
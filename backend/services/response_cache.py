@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# orjson parses and serializes several times faster than the stdlib; fall back to json without it.
+# Both libraries raise ValueError subclasses on malformed input.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class ResponseCache:
+    """
+    In-memory exact-match cache for LLM responses with TTL expiry and LRU eviction.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+            ttl_seconds: Time in seconds after which an entry is considered stale
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Build a cache key from one or more strings.
+
+        Args:
+            parts: Strings identifying the request (e.g. a namespace and the full prompt)
+
+        Returns:
+            Hex SHA-256 digest of the parts
+        """
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key from make_key
+            value: Value to cache
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters and the current size.
+
+        Returns:
+            Dictionary with hits, misses and size
+        """
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+
+class SemanticCache:
+    """
+    In-memory cache that matches requests by embedding similarity rather than exact text.
+
+    Embeddings are stored L2-normalized in a preallocated ring buffer so a lookup is a
+    single matrix-vector product. Entries are partitioned by namespace and expire after
+    a TTL, so responses never leak between unrelated contexts.
+    """
+
+    def __init__(self, capacity: int = 512, threshold: float = 0.92, ttl_seconds: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity: Maximum number of entries; the oldest entry is overwritten when full
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            ttl_seconds: Time in seconds after which an entry is considered stale
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._stored_at = np.full(capacity, -np.inf)
+        self._namespaces: List[Optional[str]] = [None] * capacity
+        self._values: List[Any] = [None] * capacity
+        self._next = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def get(self, namespace: str, embedding: Sequence[float]) -> Optional[Any]:
+        """
+        Find the most similar cached entry in a namespace.
+
+        Args:
+            namespace: Partition key (e.g. user and context) the entry must belong to
+            embedding: Embedding of the incoming request
+
+        Returns:
+            The cached value of the best match above the threshold, or None
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.stats["misses"] += 1
+                return None
+
+            now = time.monotonic()
+            valid = (now - self._stored_at) <= self.ttl_seconds
+            valid &= np.fromiter(
+                (ns == namespace for ns in self._namespaces), dtype=bool, count=self.capacity
+            )
+            if not valid.any():
+                self.stats["misses"] += 1
+                return None
+
+            similarities = self._vectors @ query
+            similarities[~valid] = -1.0
+            best = int(similarities.argmax())
+            if similarities[best] >= self.threshold:
+                self.stats["hits"] += 1
+                return self._values[best]
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, namespace: str, embedding: Sequence[float], value: Any) -> None:
+        """
+        Store a value, overwriting the oldest entry when the buffer is full.
+
+        Args:
+            namespace: Partition key the entry belongs to
+            embedding: Embedding of the request that produced the value
+            value: Value to cache
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                # Allocate once for the embedding size in use (or reset if it changes)
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+                self._stored_at.fill(-np.inf)
+                self._namespaces = [None] * self.capacity
+                self._values = [None] * self.capacity
+                self._next = 0
+
+            slot = self._next
+            self._vectors[slot] = vector
+            self._stored_at[slot] = time.monotonic()
+            self._namespaces[slot] = namespace
+            self._values[slot] = value
+            self._next = (slot + 1) % self.capacity
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters and the number of live entries.
+
+        Returns:
+            Dictionary with hits, misses and size
+        """
+        with self._lock:
+            live = (time.monotonic() - self._stored_at) <= self.ttl_seconds
+            return {**self.stats, "size": int(live.sum())}
+
+
+class DiskCache:
+    """
+    SQLite-backed exact-match cache for JSON-serializable responses.
+
+    Entries survive process restarts, so re-analyzing identical audio costs nothing.
+    The database runs in WAL mode so lookups don't block behind writes.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = float("inf")):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl_seconds: Time in seconds after which an entry is considered stale
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, response TEXT, created_at REAL)"
+        )
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key from ResponseCache.make_key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and time.time() - row[1] <= self.ttl_seconds:
+                self.stats["hits"] += 1
+                return _json_loads(row[0])
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, replacing any existing entry for the key.
+
+        Args:
+            key: Cache key from ResponseCache.make_key
+            value: JSON-serializable value to cache
+        """
+        response = _json_dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, response, time.time())
+            )
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters and the number of stored entries.
+
+        Returns:
+            Dictionary with hits, misses and size
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            return {**self.stats, "size": size}
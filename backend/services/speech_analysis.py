@@ -2,35 +2,252 @@ import torch
 import torchaudio
 from transformers import Wav2Vec2FeatureExtractor, AutoModelForAudioClassification
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import os
 import soundfile as sf
 import numpy as np
 
+# Sample rate the emotion model was trained on
+TARGET_SAMPLE_RATE = 16000
+
+# Most segments classified per forward pass; bounds the padded batch's memory.
+# Models without an attention mask pool over padding, so for them a batch only
+# holds segments of equal length (see _fits_batch)
+BATCH_SIZE = 16
+
+# Threads decoding segment files while the model runs
+LOAD_WORKERS = 8
+
+# Length of the silent clip run through the model at load time
+WARMUP_SECONDS = 1
+
 class SpeechAnalyzer:
     """
     Service for analyzing speech emotions using a pre-trained model.
     """
     
-    def __init__(self, model_name="r-f/wav2vec-english-speech-emotion-recognition"):
+    def __init__(
+        self,
+        model_name="r-f/wav2vec-english-speech-emotion-recognition",
+        cpu_bfloat16=False,
+        compile_model=False,
+        num_threads=None
+    ):
         """
         Initialize the speech analyzer with a pre-trained model.
         
         Args:
             model_name: HuggingFace model identifier
+            cpu_bfloat16: If True, run the model in bfloat16 when no GPU is available
+                (only faster on CPUs with native bfloat16 support, e.g. AVX-512 BF16/AMX)
+            compile_model: If True, wrap the model in torch.compile for fused kernels
+                (the first batch of each new input shape pays the compile cost)
+            num_threads: Optional number of intra-op CPU threads for torch; set it (e.g. to
+                half the cores) when several workers share a machine to avoid oversubscription
         """
         self.model_name = model_name
+        self.cpu_bfloat16 = cpu_bfloat16
+        self.compile_model = compile_model
+        self.num_threads = num_threads
+        # One resampler per source rate; building one recomputes its filter kernel
+        self._resamplers = {}
         self._load_model()
     
     def _load_model(self):
         """Load the feature extractor and model"""
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.device.type == "cpu" and self.num_threads:
+            torch.set_num_threads(self.num_threads)
         try:
             self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(self.model_name)
             self.model = AutoModelForAudioClassification.from_pretrained(self.model_name)
-            print(f"Successfully loaded model: {self.model_name}")
+            # Half precision doubles matmul throughput and halves activation traffic
+            if self.device.type == "cuda":
+                self.dtype = torch.float16
+            elif self.cpu_bfloat16:
+                self.dtype = torch.bfloat16
+            else:
+                self.dtype = torch.float32
+            self.model.to(self.device, dtype=self.dtype).eval()
+            self._eager_model = self.model
+            # Labels indexed by class id, so a batch's predictions map by list lookup
+            id2label = self.model.config.id2label
+            self._labels = [id2label[class_id] for class_id in range(len(id2label))]
+            if self.compile_model:
+                # Segment lengths vary, so compile for dynamic shapes instead of one graph per length
+                self.model = torch.compile(self.model, dynamic=True)
+            print(f"Successfully loaded model: {self.model_name} on {self.device} ({self.dtype})")
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             self.feature_extractor = None
             self.model = None
+            return
+        self._warm_up()
+
+    def _warm_up(self):
+        """
+        Run a short silent clip through the model so the first request doesn't pay
+        for kernel initialization (and compilation, if enabled).
+        """
+        try:
+            self._classify_batch([np.zeros(TARGET_SAMPLE_RATE * WARMUP_SECONDS, dtype=np.float32)])
+        except Exception as e:
+            print(f"Model warm-up failed: {str(e)}")
+
+    @staticmethod
+    def _get_duration(audio_file_path):
+        """Get an audio file's duration in seconds from its header, or 0 if it can't be read."""
+        try:
+            return sf.info(audio_file_path).duration
+        except Exception:
+            return 0.0
+
+    def _load_and_resample(self, audio_file_path):
+        """
+        Load an audio file as a mono waveform at the model's sample rate, ready for the model.
+
+        Args:
+            audio_file_path: Path to the audio file
+
+        Returns:
+            1-D float32 numpy array sampled at TARGET_SAMPLE_RATE and normalized
+            the way the feature extractor would
+        """
+        # Load audio using soundfile directly; float32 is all the model uses, so skip float64
+        waveform_np, sample_rate = sf.read(audio_file_path, dtype='float32')
+
+        # Convert to mono if stereo
+        if waveform_np.ndim > 1:
+            waveform_np = waveform_np.mean(axis=1, dtype=np.float32)
+
+        # Resample if necessary (model expects 16kHz)
+        if sample_rate != TARGET_SAMPLE_RATE:
+            # Wrap as a torch tensor (no copy) for resampling
+            waveform_tensor = torch.from_numpy(waveform_np)
+            waveform_tensor = self._get_resampler(sample_rate)(waveform_tensor)
+            waveform_np = waveform_tensor.numpy()
+
+        return self._normalize(waveform_np)
+
+    def _normalize(self, waveform):
+        """
+        Apply the feature extractor's zero-mean, unit-variance normalization.
+        
+        Done per file while loading (in the loader threads) so batches go straight
+        to the model without another pass through the feature extractor.
+        
+        Args:
+            waveform: 1-D float32 numpy array
+            
+        Returns:
+            The normalized waveform (the input itself if the model doesn't normalize)
+        """
+        if not self.feature_extractor.do_normalize:
+            return waveform
+        waveform -= waveform.mean()
+        waveform /= np.sqrt(waveform.var() + 1e-7)
+        return waveform
+
+    def _get_resampler(self, sample_rate):
+        """
+        Get the resampler from a source sample rate to TARGET_SAMPLE_RATE, creating it on first use.
+        
+        Args:
+            sample_rate: Sample rate of the source audio
+            
+        Returns:
+            A torchaudio Resample transform
+        """
+        resampler = self._resamplers.get(sample_rate)
+        if resampler is None:
+            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=TARGET_SAMPLE_RATE)
+            self._resamplers[sample_rate] = resampler
+        return resampler
+
+    def _classify_batch(self, waveforms):
+        """
+        Classify the emotion of several waveforms in one forward pass.
+
+        Args:
+            waveforms: List of 1-D numpy arrays from _load_and_resample
+
+        Returns:
+            List of predicted emotion labels, in input order
+        """
+        lengths = [len(waveform) for waveform in waveforms]
+        if not self.feature_extractor.return_attention_mask and min(lengths) != max(lengths):
+            # Without a mask the model would average over the padding, so a clip's label
+            # would depend on its batch; classify each length on its own instead
+            return [self._classify_batch([waveform])[0] for waveform in waveforms]
+        
+        # Pad shorter waveforms to the longest in one preallocated array
+        input_values = np.full(
+            (len(waveforms), max(lengths)), self.feature_extractor.padding_value, dtype=np.float32
+        )
+        attention_mask = np.zeros(input_values.shape, dtype=np.int64)
+        for row, (waveform, length) in enumerate(zip(waveforms, lengths)):
+            input_values[row, :length] = waveform
+            attention_mask[row, :length] = 1
+        
+        inputs = {"input_values": torch.from_numpy(input_values).to(self.device, dtype=self.dtype)}
+        if self.feature_extractor.return_attention_mask:
+            inputs["attention_mask"] = torch.from_numpy(attention_mask).to(self.device)
+
+        # Get logits
+        with torch.inference_mode():
+            try:
+                logits = self.model(**inputs).logits
+            except Exception as e:
+                if self.model is self._eager_model:
+                    raise
+                # Compilation happens on the first call; fall back to eager mode if it fails
+                print(f"torch.compile failed, using the uncompiled model: {str(e)}")
+                self.model = self._eager_model
+                logits = self.model(**inputs).logits
+            # One device-to-host transfer for the whole batch
+            predicted_class_ids = torch.argmax(logits, dim=-1).tolist()
+
+        # Convert IDs to labels
+        return [self._labels[class_id] for class_id in predicted_class_ids]
+
+    def _fits_batch(self, batch_waveforms, waveform):
+        """
+        Check whether a waveform can join a batch without changing any prediction.
+        
+        Args:
+            batch_waveforms: Waveforms already in the batch
+            waveform: Waveform to add
+            
+        Returns:
+            True if the batch has room and, when the model takes no attention mask,
+            the waveform has the same length as the rest of the batch
+        """
+        if len(batch_waveforms) >= BATCH_SIZE:
+            return False
+        if not batch_waveforms or self.feature_extractor.return_attention_mask:
+            return True
+        return len(waveform) == len(batch_waveforms[0])
+
+    def _classify_into(self, results, batch_names, batch_waveforms):
+        """
+        Classify one batch of segments and record each label in results.
+        
+        Args:
+            results: Dictionary mapping segment filenames to emotion labels, updated in place
+            batch_names: Filenames of the segments in the batch
+            batch_waveforms: Their waveforms from _load_and_resample
+        """
+        print(f"Analyzing segments: {', '.join(batch_names)}")
+        try:
+            emotions = self._classify_batch(batch_waveforms)
+        except Exception as e:
+            print(f"Error analyzing batch starting at {batch_names[0]}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return
+        for name, emotion in zip(batch_names, emotions):
+            results[name] = emotion
+            print(f"Detected emotion for {name}: {emotion}")
 
     def analyze_speech(self, audio_file_path):
         """
@@ -47,34 +264,7 @@ class SpeechAnalyzer:
             return "neutral"
 
         try:
-            # Load audio using soundfile directly
-            waveform_np, sample_rate = sf.read(audio_file_path)
-
-            # Convert to mono if stereo
-            if len(waveform_np.shape) > 1:
-                waveform_np = np.mean(waveform_np, axis=1)
-
-            # Resample if necessary (model expects 16kHz)
-            if sample_rate != 16000:
-                # Convert to torch tensor for resampling
-                waveform_tensor = torch.from_numpy(waveform_np).float()
-                resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-                waveform_tensor = resampler(waveform_tensor)
-                waveform_np = waveform_tensor.numpy()
-                sample_rate = 16000
-
-            # Convert to model inputs
-            inputs = self.feature_extractor(waveform_np, sampling_rate=sample_rate, return_tensors="pt", padding=True)
-
-            # Get logits
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                predicted_class_id = torch.argmax(logits, dim=-1).item()
-
-            # Convert ID to label
-            emotion_label = self.model.config.id2label[predicted_class_id]
-            return emotion_label
+            return self._classify_batch([self._load_and_resample(audio_file_path)])[0]
 
         except Exception as e:
             print(f"Error analyzing speech for {audio_file_path}: {str(e)}")
@@ -86,6 +276,11 @@ class SpeechAnalyzer:
         """
         Analyze all audio segments in the specified folder.
         
+        Segments are classified in batches of up to BATCH_SIZE. Each batch groups
+        segments of similar length so little compute is spent on padding; for models
+        without an attention mask a batch only holds segments of equal length, so
+        batching never changes a prediction.
+        
         Args:
             output_folder: Path to the folder containing audio segments
             
@@ -97,18 +292,39 @@ class SpeechAnalyzer:
             raise FileNotFoundError(f"Folder does not exist: {output_folder}")
 
         # Collect audio files (only segment files, not full_audio)
-        audio_files = [f for f in output_path.glob("segment_*.wav") if f.is_file()]
+        audio_files = sorted(f for f in output_path.glob("segment_*.wav") if f.is_file())
         
         if not audio_files:
             print("No audio files found in the output folder.")
             return {}
 
-        results = {}
         print(f"Found {len(audio_files)} audio segment(s).")
-        for audio_file in sorted(audio_files):
-            print(f"Analyzing segment: {audio_file.name}")
-            emotion = self.analyze_speech(audio_file)
-            results[audio_file.name] = emotion
-            print(f"Detected emotion for {audio_file.name}: {emotion}")
+        results = {audio_file.name: "neutral" for audio_file in audio_files}
+        if not self.model or not self.feature_extractor:
+            print("Model not loaded. Cannot analyze speech.")
+            return results
+
+        # Order by duration (from the file headers) so each batch holds similar lengths,
+        # then decode in a thread pool; libsndfile releases the GIL, so later batches
+        # load while earlier ones run through the model
+        ordered_files = sorted(audio_files, key=self._get_duration)
+        with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(ordered_files))) as executor:
+            futures = [executor.submit(self._load_and_resample, audio_file) for audio_file in ordered_files]
+            batch_names = []
+            batch_waveforms = []
+            for audio_file, future in zip(ordered_files, futures):
+                try:
+                    waveform = future.result()
+                except Exception as e:
+                    print(f"Error loading audio for {audio_file}: {str(e)}")
+                    continue
+                if not self._fits_batch(batch_waveforms, waveform):
+                    self._classify_into(results, batch_names, batch_waveforms)
+                    batch_names = []
+                    batch_waveforms = []
+                batch_names.append(audio_file.name)
+                batch_waveforms.append(waveform)
+            if batch_names:
+                self._classify_into(results, batch_names, batch_waveforms)
             
         return results
@@ -0,0 +1,181 @@
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("google.genai")
+
+from services.gemini_service import GeminiService, _BufferedRotatingFileHandler
+
+EMOTION_SEGMENTS = [("00:00 - 00:05", "happy"), ("00:05 - 00:10", "happy")]
+
+
+def _transcript(first_text, second_text):
+    return [
+        {"start": 0, "end": 5, "wps": 2.5, "emotion": "happy", "text": first_text},
+        {"start": 5, "end": 10, "wps": 2.5, "emotion": "happy", "text": second_text},
+    ]
+
+
+def _analysis(summary):
+    return {"summary": summary, "improvement_areas": [], "strengths": [], "coaching_tips": []}
+
+
+@pytest.fixture
+def service():
+    return GeminiService(api_key="test-key", debug_mode=False, structural_cache=True)
+
+
+@pytest.mark.parametrize("first_summary", [
+    "You opened with our quarterly revenue grew by twelve percent in a happy tone.",
+    'Your line "thanks everyone for coming" sounded happy.',
+    "A steady, happy delivery throughout.",
+])
+def test_structural_cache_does_not_leak_transcript_text(service, monkeypatch, first_summary):
+    first = _transcript("our quarterly revenue grew by twelve percent", "thanks everyone for coming")
+    second = _transcript("my grandmother taught me to bake bread", "thank you all so much")
+    # Same pace, variation, transitions and issues: both speeches fall in one bucket
+    summary = service._summarize_speech(first)
+    assert service._structural_cache_key(summary, "1") == service._structural_cache_key(
+        service._summarize_speech(second), "1"
+    )
+
+    replies = iter([_analysis(first_summary), _analysis("Fresh analysis."), _analysis("Fresh analysis.")])
+    monkeypatch.setattr(service, "_stream_analysis_text", lambda prompt: json.dumps(next(replies)))
+
+    service.analyze_speech(EMOTION_SEGMENTS, first, namespace="1")
+    other_user = service.analyze_speech(EMOTION_SEGMENTS, second, namespace="2")
+    same_user = service.analyze_speech(EMOTION_SEGMENTS, second, namespace="1")
+
+    # Another user never gets the first speech's analysis
+    assert other_user["summary"] == "Fresh analysis."
+    # The same user only gets it back when it contains none of the first speech's words
+    for word in ("quarterly", "revenue", "thanks everyone"):
+        assert word not in same_user["summary"]
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+        self.candidates = []
+
+
+class _Stream:
+    def __init__(self, texts):
+        self._chunks = [_Chunk(text) for text in texts]
+        self.exhausted = False
+
+    def __iter__(self):
+        yield from self._chunks
+        self.exhausted = True
+
+
+class _Model:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def generate_content(self, prompt, stream=False):
+        return self.stream
+
+
+def test_stream_keeps_prose_response_with_braces_and_quotes(service, monkeypatch):
+    texts = [
+        'Overall the speech was "engaging". Pacing {steady} ',
+        "stayed consistent, and the closing",
+        ' line landed well.\n```json\n{"summary": "ok"}\n```',
+    ]
+    stream = _Stream(texts)
+    monkeypatch.setattr(service, "_get_analysis_model", lambda: _Model(stream))
+
+    assert service._stream_analysis_text("prompt") == "".join(texts)
+
+
+def test_stream_reads_json_response_to_the_end(service, monkeypatch):
+    texts = ['{"summary": "a } in a string"', "", ', "strengths": []}']
+    stream = _Stream(texts)
+    monkeypatch.setattr(service, "_get_analysis_model", lambda: _Model(stream))
+
+    assert service._stream_analysis_text("prompt") == "".join(texts)
+    # The stream is consumed normally, not abandoned or drained separately
+    assert stream.exhausted
+
+
+def test_debug_log_handler_buffers_writes_and_rotates(tmp_path):
+    path = tmp_path / "responses.jsonl"
+    handler = _BufferedRotatingFileHandler(str(path), maxBytes=1000, backupCount=2, encoding="utf-8")
+    formatted = []
+
+    class CountingFormatter(logging.Formatter):
+        def format(self, record):
+            formatted.append(record)
+            return super().format(record)
+
+    handler.setFormatter(CountingFormatter("%(message)s"))
+    record = logging.makeLogRecord({"msg": "x" * 99})
+    try:
+        for _ in range(5):
+            handler.handle(record)
+        # Nothing reaches the file until the buffer is flushed, and each record is formatted once
+        assert path.stat().st_size == 0
+        assert len(formatted) == 5
+        handler.flush_buffer()
+        assert path.stat().st_size == 500
+
+        # The 11th record would pass maxBytes, so the file rotates before it is written
+        for _ in range(6):
+            handler.handle(record)
+        assert (tmp_path / "responses.jsonl.1").stat().st_size == 1000
+        handler.flush_buffer()
+        assert path.stat().st_size == 100
+    finally:
+        handler.close()
+
+
+class _BatchClient:
+    """Batch API stand-in that returns the given result lines for any submitted batch."""
+
+    def __init__(self, lines):
+        job = SimpleNamespace(
+            name="batches/1",
+            state=SimpleNamespace(name="JOB_STATE_SUCCEEDED"),
+            dest=SimpleNamespace(file_name="files/results"),
+        )
+        self.files = SimpleNamespace(
+            upload=lambda file, config=None: SimpleNamespace(name="files/requests"),
+            download=lambda file: "\n".join(lines).encode("utf-8"),
+        )
+        self.batches = SimpleNamespace(create=lambda model, src: job, get=lambda name: job)
+
+
+def _batch_line(key, summary):
+    text = json.dumps(_analysis(summary))
+    return json.dumps({"key": key, "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}})
+
+
+def test_batch_skips_result_lines_with_bad_keys(service, monkeypatch):
+    lines = [
+        _batch_line("0", "First speech."),
+        _batch_line("-1", "Belongs to no job."),
+        _batch_line("5", "Out of range."),
+        "not json",
+    ]
+    monkeypatch.setattr(service, "_get_genai_client", lambda: _BatchClient(lines))
+    fallback_calls = []
+    generate_fallback = service.generate_fallback_analysis
+    monkeypatch.setattr(
+        service, "generate_fallback_analysis",
+        lambda segments: fallback_calls.append(segments) or generate_fallback(segments)
+    )
+
+    results = service.analyze_speech_batch([
+        (EMOTION_SEGMENTS, _transcript("first speech text", "more words")),
+        (EMOTION_SEGMENTS, _transcript("second speech text", "other words")),
+    ], poll_interval=0)
+
+    assert results[0]["summary"] == "First speech."
+    # The second job got no valid line, so only it falls back
+    assert results[1]["summary"] not in ("Belongs to no job.", "Out of range.")
+    assert len(fallback_calls) == 1
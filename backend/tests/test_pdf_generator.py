@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab import rl_config
+
+from utils.pdf_generator import SpeechAnalysisPDF
+
+
+@pytest.fixture(autouse=True)
+def invariant_pdf_output(monkeypatch):
+    # Fixed document ids and timestamps so identical reports have identical bytes
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def _analysis(index):
+    return SimpleNamespace(
+        filename=f"talk-{index}.mp4",
+        duration=125.0,
+        created_at=datetime(2026, 1, 2, 3, 4),
+        dominant_emotion="calm",
+        avg_wps=2.3,
+        clarity_score=81.0,
+        total_words=300,
+        emotion_segments=[
+            {"time_range": f"00:{i:02d}-00:{i + 1:02d}", "emotion": "calm" if i % 3 else "happy"}
+            for i in range(25)
+        ],
+        emotion_metrics={
+            "main_emotion": "calm", "main_emotion_percentage": 60.0,
+            "emotion_diversity": 2, "versatility_score": 40.0,
+        },
+        transcription_data=[
+            {"start": i * 5, "end": i * 5 + 5, "text": f"words & <stuff> {i}", "emotion": "calm", "wps": 2.0}
+            for i in range(20)
+        ],
+        speech_clarity={"avg_words_per_segment": 10.0, "wps_variation": 0.4, "issues": ["a", "b"]},
+        gemini_analysis={
+            "summary": "Good", "strengths": ["x"], "improvement_areas": ["y"],
+            "coaching_tips": ["t1", {"tip": "t2"}],
+        },
+    )
+
+
+USER = SimpleNamespace(name="Pat", email="pat@example.com")
+
+
+def _build(index):
+    return SpeechAnalysisPDF().generate_pdf(_analysis(index), USER).getvalue()
+
+
+def test_reports_built_concurrently_match_serial_builds():
+    serial = [_build(index) for index in range(8)]
+    assert serial[0].startswith(b"%PDF")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(executor.map(_build, range(8)))
+
+    assert concurrent == serial
+
+
+def test_repeated_reports_are_identical():
+    # No flowable carries state from one report into the next
+    assert _build(0) == _build(0)
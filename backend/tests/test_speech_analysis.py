@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+pytest.importorskip("transformers")
+pytest.importorskip("soundfile")
+
+import numpy as np
+
+from services.speech_analysis import SpeechAnalyzer
+
+
+class _MeanPoolingModel:
+    """Stand-in for a wav2vec2 classifier that averages over every frame it is given."""
+
+    def __init__(self):
+        self.batch_lengths = []
+
+    def __call__(self, input_values, attention_mask=None):
+        values = input_values.numpy()
+        self.batch_lengths.append(values.shape[1])
+        if attention_mask is not None:
+            mask = attention_mask.numpy()
+            pooled = (values * mask).sum(axis=1) / mask.sum(axis=1)
+        else:
+            pooled = values.mean(axis=1)
+        logits = np.stack([pooled - 0.5, np.zeros_like(pooled)], axis=1)
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def _analyzer(return_attention_mask):
+    analyzer = SpeechAnalyzer.__new__(SpeechAnalyzer)
+    analyzer.device = torch.device("cpu")
+    analyzer.dtype = torch.float32
+    analyzer.feature_extractor = SimpleNamespace(
+        return_attention_mask=return_attention_mask, padding_value=0.0, do_normalize=False
+    )
+    analyzer.model = analyzer._eager_model = _MeanPoolingModel()
+    analyzer._labels = ["loud", "quiet"]
+    analyzer._resamplers = {}
+    return analyzer
+
+
+@pytest.mark.parametrize("return_attention_mask", [False, True])
+def test_padded_batch_matches_unbatched_labels(return_attention_mask):
+    analyzer = _analyzer(return_attention_mask)
+    short = np.ones(100, dtype=np.float32)
+    long = np.full(2000, 0.25, dtype=np.float32)
+
+    unbatched = [analyzer._classify_batch([short])[0], analyzer._classify_batch([long])[0]]
+    assert unbatched == ["loud", "quiet"]
+    assert analyzer._classify_batch([short, long]) == unbatched
+
+
+@pytest.mark.parametrize("return_attention_mask, forward_passes", [(False, 2), (True, 1)])
+def test_segment_batches_follow_attention_mask_support(tmp_path, return_attention_mask, forward_passes):
+    analyzer = _analyzer(return_attention_mask)
+    waveforms = {
+        "segment_000.wav": np.ones(100, dtype=np.float32),
+        "segment_001.wav": np.full(2000, 0.25, dtype=np.float32),
+        "segment_002.wav": np.ones(100, dtype=np.float32),
+        "segment_003.wav": np.full(2000, 0.25, dtype=np.float32),
+    }
+    for name in waveforms:
+        (tmp_path / name).touch()
+    analyzer._load_and_resample = lambda path: waveforms[path.name].copy()
+    analyzer._get_duration = lambda path: len(waveforms[path.name])
+
+    results = analyzer.analyze_segments(str(tmp_path))
+    # Without a mask each batch holds one length; with one, mixed lengths share a batch
+    assert len(analyzer.model.batch_lengths) == forward_passes
+
+    assert results == {
+        name: analyzer._classify_batch([waveform])[0] for name, waveform in waveforms.items()
+    }
@@ -2,6 +2,7 @@ import os
 import subprocess
 import re
 import json
+from collections import Counter
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 
@@ -57,8 +58,7 @@ class DataProcessor:
         Returns:
             Formatted time string in MM:SS format
         """
-        minutes = int(seconds // 60)
-        seconds = int(seconds % 60)
+        minutes, seconds = divmod(int(seconds), 60)
         return f"{minutes:02d}:{seconds:02d}"
     
     def process_emotion_data(
@@ -159,25 +159,19 @@ class DataProcessor:
         
         # Count occurrences of each emotion
         emotions = [emotion for _, emotion in emotion_segments]
-        emotion_counts = {}
-        for emotion in emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        counter = Counter(emotions)
+        emotion_counts = dict(counter)
         
         # Calculate statistics
         total_segments = len(emotion_segments)
-        sorted_counts = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)
-        dominant_emotion = sorted_counts[0][0] if sorted_counts else "none"
-        dominant_count = sorted_counts[0][1] if sorted_counts else 0
+        dominant_emotion, dominant_count = counter.most_common(1)[0]
         dominant_percentage = (dominant_count / total_segments) * 100 if total_segments > 0 else 0
         
         # Calculate emotion diversity
         emotion_diversity = len(emotion_counts)
         
-        # Count emotion transitions
-        emotion_transitions = 0
-        for i in range(1, len(emotions)):
-            if emotions[i] != emotions[i-1]:
-                emotion_transitions += 1
+        # Count emotion transitions over adjacent pairs
+        emotion_transitions = sum(a != b for a, b in zip(emotions, emotions[1:]))
         
         return {
             "emotion_counts": emotion_counts,
@@ -6,68 +6,159 @@ from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 import io
 from datetime import datetime
+from xml.sax.saxutils import escape
+
+# zlib-compress page content streams; set explicitly so an RL_pageCompression
+# override in the environment can't produce uncompressed reports
+PAGE_COMPRESSION = 1
+
+# Table styles shared by all reports
+METRICS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+])
+
+EMOTION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+])
+
+# Paragraph markup templates; every interpolated value is escaped first
+USER_INFO_TEMPLATE = (
+    "<b>User:</b> {name}<br/>"
+    "<b>Email:</b> {email}<br/>"
+    "<b>Analysis Date:</b> {date}<br/>"
+    "<b>File:</b> {filename}<br/>"
+    "<b>Duration:</b> {duration}"
+)
+EMOTION_METRICS_TEMPLATE = (
+    "<b>Main Emotion:</b> {main_emotion} ({percentage:.1f}%)<br/>"
+    "<b>Emotion Diversity:</b> {diversity} different emotions<br/>"
+    "<b>Versatility Score:</b> {versatility:.1f}%"
+)
+CLARITY_TEMPLATE = (
+    "<b>Average Words Per Segment:</b> {avg_words:.1f}<br/>"
+    "<b>WPS Variation:</b> {wps_variation:.2f}<br/>"
+)
+SEGMENT_TEMPLATE = (
+    "<b>Segment {index} ({start} - {end}):</b> {text}<br/>"
+    "<i>Emotion: {emotion} | WPS: {wps:.2f}</i>"
+)
+
+# Stylesheet shared by all reports; built on first use and never mutated afterwards
+_STYLES = None
+
+def _build_styles():
+    """Build the sample stylesheet with the report's custom paragraph styles"""
+    styles = getSampleStyleSheet()
+    
+    # Title style
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+    
+    # Heading style
+    styles.add(ParagraphStyle(
+        name='SectionHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=12,
+        spaceBefore=20
+    ))
+    
+    # Body text style; the sample stylesheet already defines BodyText, and add()
+    # refuses duplicate names, so replace the entry directly
+    styles.byName['BodyText'] = ParagraphStyle(
+        name='BodyText',
+        parent=styles['Normal'],
+        fontSize=11,
+        leading=14,
+        alignment=TA_JUSTIFY
+    )
+    return styles
+
+def _get_styles():
+    """Get the shared report stylesheet, building it on first use"""
+    global _STYLES
+    if _STYLES is None:
+        _STYLES = _build_styles()
+    return _STYLES
+
+def _spacer(height):
+    """
+    Build a spacer for a height in inches.
+    
+    Always a new instance: frames set and clear attributes on each flowable while
+    laying it out, so one shared spacer would race across concurrent builds.
+    """
+    return Spacer(1, height*inch)
 
 class SpeechAnalysisPDF:
     """Generate PDF reports for speech analysis results"""
     
+    # Created per export; no per-instance __dict__ needed
+    __slots__ = ("styles",)
+    
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        # Shared across instances; treat as read-only
+        self.styles = _get_styles()
     
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        # Title style
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-        
-        # Heading style
-        self.styles.add(ParagraphStyle(
-            name='SectionHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#34495e'),
-            spaceAfter=12,
-            spaceBefore=20
-        ))
+    def generate_pdf(self, analysis, user, output=None):
+        """
+        Generate a PDF report for the analysis.
         
-        # Body text style
-        self.styles.add(ParagraphStyle(
-            name='BodyText',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            leading=14,
-            alignment=TA_JUSTIFY
-        ))
-    
-    def generate_pdf(self, analysis, user):
-        """Generate a PDF report for the analysis"""
-        buffer = io.BytesIO()
+        Args:
+            analysis: Analysis record to report on
+            user: User the report is for
+            output: Optional file path or writable binary file to write the PDF to
+                directly, instead of holding it in memory
+            
+        Returns:
+            A BytesIO positioned at the start of the PDF, or output if one was given
+        """
+        buffer = io.BytesIO() if output is None else output
         doc = SimpleDocTemplate(buffer, pagesize=letter,
                                rightMargin=72, leftMargin=72,
-                               topMargin=72, bottomMargin=72)
+                               topMargin=72, bottomMargin=72,
+                               pageCompression=PAGE_COMPRESSION)
         story = []
         
         # Title
         title = Paragraph("Speech Analysis Report", self.styles['CustomTitle'])
         story.append(title)
-        story.append(Spacer(1, 0.2*inch))
+        story.append(_spacer(0.2))
         
         # User info section
-        user_info = f"""
-        <b>User:</b> {user.name or 'N/A'}<br/>
-        <b>Email:</b> {user.email or 'N/A'}<br/>
-        <b>Analysis Date:</b> {analysis.created_at.strftime('%B %d, %Y at %I:%M %p') if analysis.created_at else 'N/A'}<br/>
-        <b>File:</b> {analysis.filename or 'N/A'}<br/>
-        <b>Duration:</b> {self._format_duration(analysis.duration) if analysis.duration else 'N/A'}
-        """
+        user_info = USER_INFO_TEMPLATE.format(
+            name=escape(user.name or 'N/A'),
+            email=escape(user.email or 'N/A'),
+            date=analysis.created_at.strftime('%B %d, %Y at %I:%M %p') if analysis.created_at else 'N/A',
+            filename=escape(analysis.filename or 'N/A'),
+            duration=self._format_duration(analysis.duration) if analysis.duration else 'N/A'
+        )
         story.append(Paragraph(user_info, self.styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
+        story.append(_spacer(0.3))
         
         # Key Metrics Table
         story.append(Paragraph("Key Metrics", self.styles['SectionHeading']))
@@ -80,19 +171,9 @@ class SpeechAnalysisPDF:
         ]
         
         metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
-        ]))
+        metrics_table.setStyle(METRICS_TABLE_STYLE)
         story.append(metrics_table)
-        story.append(Spacer(1, 0.3*inch))
+        story.append(_spacer(0.3))
         
         # Emotion Analysis Section
         if analysis.emotion_segments:
@@ -101,50 +182,40 @@ class SpeechAnalysisPDF:
             # Emotion metrics if available
             if analysis.emotion_metrics:
                 emotion_metrics = analysis.emotion_metrics
-                emotion_text = f"""
-                <b>Main Emotion:</b> {emotion_metrics.get('main_emotion', 'N/A')} 
-                ({emotion_metrics.get('main_emotion_percentage', 0):.1f}%)<br/>
-                <b>Emotion Diversity:</b> {emotion_metrics.get('emotion_diversity', 0)} different emotions<br/>
-                <b>Versatility Score:</b> {emotion_metrics.get('versatility_score', 0):.1f}%
-                """
+                emotion_text = EMOTION_METRICS_TEMPLATE.format(
+                    main_emotion=escape(str(emotion_metrics.get('main_emotion', 'N/A'))),
+                    percentage=emotion_metrics.get('main_emotion_percentage', 0),
+                    diversity=emotion_metrics.get('emotion_diversity', 0),
+                    versatility=emotion_metrics.get('versatility_score', 0)
+                )
                 story.append(Paragraph(emotion_text, self.styles['BodyText']))
-                story.append(Spacer(1, 0.2*inch))
+                story.append(_spacer(0.2))
             
-            # Emotion segments table
+            # Emotion segments table; segments are all stored dicts or all
+            # (time_range, emotion) pairs, so check the shape once
+            segments = analysis.emotion_segments[:20]  # Limit to first 20 segments
             emotion_data = [['Time Range', 'Emotion']]
-            for segment in analysis.emotion_segments[:20]:  # Limit to first 20 segments
-                if isinstance(segment, dict):
-                    emotion_data.append([
-                        segment.get('time_range', 'N/A'),
-                        segment.get('emotion', 'N/A')
-                    ])
-                elif isinstance(segment, (list, tuple)) and len(segment) >= 2:
-                    emotion_data.append([segment[0], segment[1]])
+            if isinstance(segments[0], dict):
+                emotion_data += [
+                    [segment.get('time_range', 'N/A'), segment.get('emotion', 'N/A')]
+                    for segment in segments
+                ]
+            elif isinstance(segments[0], (list, tuple)):
+                emotion_data += [[segment[0], segment[1]] for segment in segments if len(segment) >= 2]
             
             if len(emotion_data) > 1:
                 emotion_table = Table(emotion_data, colWidths=[2.5*inch, 2.5*inch])
-                emotion_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
-                ]))
+                emotion_table.setStyle(EMOTION_TABLE_STYLE)
                 story.append(emotion_table)
                 
                 if len(analysis.emotion_segments) > 20:
-                    story.append(Spacer(1, 0.1*inch))
+                    story.append(_spacer(0.1))
                     story.append(Paragraph(
                         f"<i>Showing first 20 of {len(analysis.emotion_segments)} segments</i>",
                         self.styles['Normal']
                     ))
             
-            story.append(Spacer(1, 0.3*inch))
+            story.append(_spacer(0.3))
         
         # Transcription Section
         if analysis.transcription_data:
@@ -153,21 +224,21 @@ class SpeechAnalysisPDF:
             # Speech clarity metrics if available
             if analysis.speech_clarity:
                 clarity = analysis.speech_clarity
-                clarity_text = f"""
-                <b>Average Words Per Segment:</b> {clarity.get('avg_words_per_segment', 0):.1f}<br/>
-                <b>WPS Variation:</b> {clarity.get('wps_variation', 0):.2f}<br/>
-                """
+                clarity_text = CLARITY_TEMPLATE.format(
+                    avg_words=clarity.get('avg_words_per_segment', 0),
+                    wps_variation=clarity.get('wps_variation', 0)
+                )
                 if clarity.get('issues'):
-                    issues_text = "<b>Issues Detected:</b><br/>" + "<br/>".join(
-                        f"• {issue}" for issue in clarity['issues'][:5]
+                    clarity_text += "<b>Issues Detected:</b><br/>" + "<br/>".join(
+                        f"• {escape(str(issue))}" for issue in clarity['issues'][:5]
                     )
-                    clarity_text += issues_text
                 
                 story.append(Paragraph(clarity_text, self.styles['BodyText']))
-                story.append(Spacer(1, 0.2*inch))
+                story.append(_spacer(0.2))
             
-            # Transcription segments
-            transcription_text = ""
+            # Transcription segments, one paragraph each so ReportLab lays them out
+            # independently instead of parsing one large block
+            segment_paragraphs = []
             for i, segment in enumerate(analysis.transcription_data[:15], 1):  # Limit to first 15 segments
                 if isinstance(segment, dict):
                     start = self._format_timestamp(segment.get('start', 0))
@@ -176,13 +247,17 @@ class SpeechAnalysisPDF:
                     emotion = segment.get('emotion', 'N/A')
                     wps = segment.get('wps', 0)
                     
-                    transcription_text += f"""
-                    <b>Segment {i} ({start} - {end}):</b> {text}<br/>
-                    <i>Emotion: {emotion} | WPS: {wps:.2f}</i><br/><br/>
-                    """
+                    segment_paragraphs.append(Paragraph(
+                        SEGMENT_TEMPLATE.format(
+                            index=i, start=start, end=end,
+                            text=escape(str(text)), emotion=escape(str(emotion)), wps=wps
+                        ),
+                        self.styles['BodyText']
+                    ))
+                    segment_paragraphs.append(_spacer(0.15))
             
-            if transcription_text:
-                story.append(Paragraph(transcription_text, self.styles['BodyText']))
+            if segment_paragraphs:
+                story.extend(segment_paragraphs)
                 
                 if len(analysis.transcription_data) > 15:
                     story.append(Paragraph(
@@ -190,7 +265,7 @@ class SpeechAnalysisPDF:
                         self.styles['Normal']
                     ))
             
-            story.append(Spacer(1, 0.3*inch))
+            story.append(_spacer(0.3))
         
         # Gemini AI Analysis Section
         if analysis.gemini_analysis:
@@ -201,63 +276,59 @@ class SpeechAnalysisPDF:
             # Summary
             if gemini.get('summary'):
                 story.append(Paragraph("<b>Summary:</b>", self.styles['Normal']))
-                story.append(Paragraph(gemini['summary'], self.styles['BodyText']))
-                story.append(Spacer(1, 0.2*inch))
+                story.append(Paragraph(escape(str(gemini['summary'])), self.styles['BodyText']))
+                story.append(_spacer(0.2))
             
             # Strengths
             if gemini.get('strengths'):
-                strengths_text = "<b>Strengths:</b><br/>"
+                story.append(Paragraph("<b>Strengths:</b>", self.styles['BodyText']))
                 if isinstance(gemini['strengths'], list):
-                    strengths_text += "<br/>".join(f"• {strength}" for strength in gemini['strengths'])
+                    story.extend(Paragraph(f"• {escape(str(strength))}", self.styles['BodyText']) for strength in gemini['strengths'])
                 else:
-                    strengths_text += str(gemini['strengths'])
-                story.append(Paragraph(strengths_text, self.styles['BodyText']))
-                story.append(Spacer(1, 0.2*inch))
+                    story.append(Paragraph(escape(str(gemini['strengths'])), self.styles['BodyText']))
+                story.append(_spacer(0.2))
             
             # Improvement Areas
             if gemini.get('improvement_areas'):
-                improvements_text = "<b>Areas for Improvement:</b><br/>"
+                story.append(Paragraph("<b>Areas for Improvement:</b>", self.styles['BodyText']))
                 if isinstance(gemini['improvement_areas'], list):
-                    improvements_text += "<br/>".join(f"• {area}" for area in gemini['improvement_areas'])
+                    story.extend(Paragraph(f"• {escape(str(area))}", self.styles['BodyText']) for area in gemini['improvement_areas'])
                 else:
-                    improvements_text += str(gemini['improvement_areas'])
-                story.append(Paragraph(improvements_text, self.styles['BodyText']))
-                story.append(Spacer(1, 0.2*inch))
+                    story.append(Paragraph(escape(str(gemini['improvement_areas'])), self.styles['BodyText']))
+                story.append(_spacer(0.2))
             
             # Coaching Tips
             if gemini.get('coaching_tips'):
-                tips_text = "<b>Coaching Tips:</b><br/>"
+                story.append(Paragraph("<b>Coaching Tips:</b>", self.styles['BodyText']))
                 tips_list = gemini['coaching_tips']
                 if isinstance(tips_list, list):
                     for i, tip in enumerate(tips_list, 1):
                         tip_text = tip if isinstance(tip, str) else (tip.get('tip', '') if isinstance(tip, dict) else str(tip))
-                        tips_text += f"<b>{i}.</b> {tip_text}<br/>"
+                        story.append(Paragraph(f"<b>{i}.</b> {escape(str(tip_text))}", self.styles['BodyText']))
                 else:
-                    tips_text += str(tips_list)
-                story.append(Paragraph(tips_text, self.styles['BodyText']))
+                    story.append(Paragraph(escape(str(tips_list)), self.styles['BodyText']))
         
         # Footer
-        story.append(Spacer(1, 0.5*inch))
+        story.append(_spacer(0.5))
         footer_text = f"<i>Report generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</i>"
         story.append(Paragraph(footer_text, self.styles['Normal']))
         
         # Build PDF
         doc.build(story)
-        buffer.seek(0)
+        if output is None:
+            buffer.seek(0)
         return buffer
     
     def _format_duration(self, seconds):
         """Format duration in seconds to MM:SS format"""
         if not seconds:
             return 'N/A'
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
+        minutes, secs = divmod(int(seconds), 60)
         return f"{minutes:02d}:{secs:02d}"
     
     def _format_timestamp(self, seconds):
         """Format timestamp in seconds to MM:SS format"""
         if not seconds:
             return '00:00'
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
+        minutes, secs = divmod(int(seconds), 60)
         return f"{minutes:02d}:{secs:02d}"
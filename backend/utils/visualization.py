@@ -1,6 +1,33 @@
-import pandas as pd
-import statistics
-from typing import List, Dict, Tuple, Any, Optional
+import math
+import re
+from collections import Counter
+from types import MappingProxyType
+import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Tuple, Any, Mapping, Optional
+
+# pandas is imported where a DataFrame is built, so importing this module (and
+# the API routes) doesn't pay for it
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Filler words and phrases flagged in speech clarity checks
+FILLER_WORDS = ("um", "uh", "like", "you know", "sort of", "kind of")
+_FILLER_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, FILLER_WORDS)) + r")\b", re.IGNORECASE)
+
+# Colors for each emotion, shared by every chart
+EMOTION_COLORS = MappingProxyType({
+    "angry": "#ff6b6b",
+    "calm": "#6495ed",
+    "sad": "#9370db",
+    "surprised": "#ffd700",
+    "happy": "#7cfc00",
+    "neutral": "#d3d3d3",
+    "anxious": "#ff7f50",
+    "disappointed": "#708090",
+    "fearful": "#8a2be2",
+    "excited": "#00ff7f",
+    "unknown": "#ffffff"
+})
 
 class VisualizationHelper:
     """
@@ -8,11 +35,14 @@ class VisualizationHelper:
     Transforms raw data into formats suitable for visualization libraries.
     """
     
+    # Stateless; no per-instance __dict__ needed
+    __slots__ = ()
+    
     def __init__(self):
         """Initialize the visualization helper"""
         pass
     
-    def prepare_emotion_timeline_data(self, emotion_segments: List[Tuple[str, str]]) -> pd.DataFrame:
+    def prepare_emotion_timeline_data(self, emotion_segments: List[Tuple[str, str]]) -> "pd.DataFrame":
         """
         Convert emotion segment data to DataFrame for visualization.
         
@@ -23,20 +53,23 @@ class VisualizationHelper:
             DataFrame with preprocessed emotion data
         """
         # Convert emotion data to DataFrame for analysis
+        import pandas as pd
+        
         emotion_df = pd.DataFrame(emotion_segments, columns=["Time Range", "Emotion"])
         
-        # Create new columns with numeric start time for plotting
-        emotion_df["Start Time"] = emotion_df["Time Range"].apply(lambda x: x.split(" - ")[0])
-        emotion_df["End Time"] = emotion_df["Time Range"].apply(lambda x: x.split(" - ")[1])
+        # Split every "MM:SS - MM:SS" range in one vectorized pass
+        bounds = emotion_df["Time Range"].str.split(" - ", n=1, expand=True).reindex(columns=[0, 1])
+        emotion_df["Start Time"] = bounds[0]
+        emotion_df["End Time"] = bounds[1]
         
         # Add time in seconds for plotting
-        emotion_df["Start Seconds"] = emotion_df["Start Time"].apply(self._time_to_seconds)
-        emotion_df["End Seconds"] = emotion_df["End Time"].apply(self._time_to_seconds)
+        emotion_df["Start Seconds"] = self._times_to_seconds(bounds[0])
+        emotion_df["End Seconds"] = self._times_to_seconds(bounds[1])
         emotion_df["Mid Seconds"] = (emotion_df["Start Seconds"] + emotion_df["End Seconds"]) / 2
         
         return emotion_df
     
-    def calculate_emotion_metrics(self, emotion_df: pd.DataFrame) -> Dict[str, Any]:
+    def calculate_emotion_metrics(self, emotion_df: "pd.DataFrame") -> Dict[str, Any]:
         """
         Calculate metrics about the emotion distribution.
         
@@ -46,16 +79,33 @@ class VisualizationHelper:
         Returns:
             Dictionary with calculated emotion metrics
         """
+        return self.calculate_emotion_metrics_from_segments(
+            list(zip(emotion_df["Time Range"], emotion_df["Emotion"]))
+        )
+    
+    def calculate_emotion_metrics_from_segments(self, emotion_segments: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Calculate metrics about the emotion distribution without building a DataFrame.
+        
+        Args:
+            emotion_segments: List of (time_range, emotion) tuples
+            
+        Returns:
+            Dictionary with calculated emotion metrics
+        """
+        emotions = [emotion for _, emotion in emotion_segments]
+        
         # Count occurrences of each emotion
-        emotion_counts = emotion_df["Emotion"].value_counts().to_dict()
+        counter = Counter(emotions)
+        emotion_counts = dict(counter.most_common())
         
         # Calculate diversity of emotions
         emotion_diversity = len(emotion_counts)
         
         # Calculate main emotion percentage
-        if len(emotion_df) > 0:
-            main_emotion = next(iter(emotion_counts)) if emotion_counts else "None"
-            main_emotion_percentage = (emotion_counts[main_emotion] / len(emotion_df)) * 100
+        if emotions:
+            main_emotion, main_count = counter.most_common(1)[0]
+            main_emotion_percentage = (main_count / len(emotions)) * 100
         else:
             main_emotion = "None"
             main_emotion_percentage = 0
@@ -63,14 +113,12 @@ class VisualizationHelper:
         # Calculate emotional versatility
         versatility_score = min(emotion_diversity / 5 * 100, 100)
         
-        # Create emotion transitions list
-        transitions = []
-        if len(emotion_df) > 1:
-            for i in range(len(emotion_df) - 1):
-                from_emotion = emotion_df.iloc[i]["Emotion"]
-                to_emotion = emotion_df.iloc[i+1]["Emotion"]
-                if from_emotion != to_emotion:
-                    transitions.append(f"{from_emotion} → {to_emotion}")
+        # Create emotion transitions list over adjacent pairs
+        transitions = [
+            f"{from_emotion} → {to_emotion}"
+            for from_emotion, to_emotion in zip(emotions, emotions[1:])
+            if from_emotion != to_emotion
+        ]
         
         return {
             "emotion_counts": emotion_counts,
@@ -81,7 +129,7 @@ class VisualizationHelper:
             "transitions": transitions
         }
     
-    def prepare_wps_data(self, transcription_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    def prepare_wps_data(self, transcription_data: List[Dict[str, Any]]) -> "pd.DataFrame":
         """
         Prepare words-per-second data for visualization.
         
@@ -91,26 +139,28 @@ class VisualizationHelper:
         Returns:
             DataFrame with WPS data
         """
+        import pandas as pd
+        
         if not transcription_data:
             return pd.DataFrame(columns=["Time", "WPS", "Optimal Min", "Optimal Max", "Emotion"])
         
-        # Extract data points
-        data_points = []
+        # Fill column arrays directly instead of building a dict per row
+        count = len(transcription_data)
+        times = np.empty(count)
+        wps = np.empty(count)
+        emotions = [None] * count
+        for i, segment in enumerate(transcription_data):
+            times[i] = (segment["start"] + segment["end"]) / 2
+            wps[i] = segment["wps"]
+            emotions[i] = segment["emotion"]
         
-        for segment in transcription_data:
-            time = (segment["start"] + segment["end"]) / 2
-            wps = segment["wps"]
-            emotion = segment["emotion"]
-            
-            data_points.append({
-                "Time": time,
-                "WPS": wps,
-                "Optimal Min": 2.0,
-                "Optimal Max": 3.0,
-                "Emotion": emotion
-            })
-        
-        return pd.DataFrame(data_points)
+        return pd.DataFrame({
+            "Time": times,
+            "WPS": wps,
+            "Optimal Min": 2.0,
+            "Optimal Max": 3.0,
+            "Emotion": emotions
+        })
     
     def prepare_speech_clarity_data(self, transcription_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -132,37 +182,43 @@ class VisualizationHelper:
                 "issues": []
             }
         
-        # Calculate metrics
-        total_words = sum(len(segment["text"].split()) for segment in transcription_data)
-        avg_words_per_segment = total_words / len(transcription_data)
-        
-        wps_values = [segment["wps"] for segment in transcription_data]
-        avg_wps = sum(wps_values) / len(wps_values) if wps_values else 0
-        
-        # Calculate standard deviation for more meaningful variation metric
-        # Standard deviation is more statistically meaningful than range
-        # Typical standard deviation for natural speech is around 0.3-0.7 WPS
-        wps_variation = statistics.stdev(wps_values) if len(wps_values) > 1 else 0
-        
-        # Simplified clarity score calculation
-        clarity_score = min(100, max(0, (avg_words_per_segment / 20) * 100))
-        
-        # Identify potential clarity issues
+        # Count words, track the WPS mean and variance (Welford's online algorithm)
+        # and identify potential clarity issues in one pass
+        total_words = 0
+        wps_mean = 0.0
+        wps_m2 = 0.0
         issues = []
         for i, segment in enumerate(transcription_data):
             text = segment["text"]
-            words = text.split()
+            word_count = len(text.split())
+            total_words += word_count
+            wps = segment["wps"]
+            delta = wps - wps_mean
+            wps_mean += delta / (i + 1)
+            wps_m2 += delta * (wps - wps_mean)
             
             # Check for very short segments
-            if len(words) < 3 and segment["end"] - segment["start"] > 2:
+            if word_count < 3 and segment["end"] - segment["start"] > 2:
                 issues.append(f"Segment {i+1} has very few words for its duration")
             
-            # Check for filler words
-            filler_words = ["um", "uh", "like", "you know", "sort of", "kind of"]
-            filler_count = sum(text.lower().count(word) for word in filler_words)
-            if filler_count > len(words) * 0.2:
+            # Check for filler words (whole words only, in one scan of the text)
+            filler_count = len(_FILLER_RE.findall(text))
+            if filler_count > word_count * 0.2:
                 issues.append(f"Segment {i+1} has many filler words")
         
+        # Calculate metrics
+        segment_count = len(transcription_data)
+        avg_words_per_segment = total_words / segment_count
+        avg_wps = wps_mean
+        
+        # Calculate standard deviation for more meaningful variation metric
+        # Standard deviation is more statistically meaningful than range
+        # Typical standard deviation for natural speech is around 0.3-0.7 WPS
+        wps_variation = math.sqrt(wps_m2 / (segment_count - 1)) if segment_count > 1 else 0
+        
+        # Simplified clarity score calculation
+        clarity_score = min(100, max(0, (avg_words_per_segment / 20) * 100))
+        
         return {
             "avg_words_per_segment": round(avg_words_per_segment, 1),
             "avg_wps": round(avg_wps, 2),
@@ -182,26 +238,30 @@ class VisualizationHelper:
         Returns:
             Time in seconds
         """
-        minutes, seconds = map(int, time_str.split(":"))
-        return minutes * 60 + seconds
+        minutes, _, seconds = time_str.partition(":")
+        return int(minutes) * 60 + int(seconds)
+    
+    def _times_to_seconds(self, times: "pd.Series") -> np.ndarray:
+        """
+        Convert a column of MM:SS strings to seconds.
+        
+        Args:
+            times: Series of time strings in MM:SS format
+            
+        Returns:
+            Array of times in seconds
+        """
+        if times.empty:
+            return np.zeros(0, dtype=np.int64)
+        parts = times.str.split(":", n=1, expand=True).reindex(columns=[0, 1]).to_numpy(dtype=np.int64)
+        return parts[:, 0] * 60 + parts[:, 1]
     
-    def get_emotion_color_map(self) -> Dict[str, str]:
+    def get_emotion_color_map(self) -> Mapping[str, str]:
         """
         Get a mapping of emotions to colors for consistent visualization.
         
         Returns:
-            Dictionary mapping emotion names to color codes
+            Read-only mapping of emotion names to color codes (convert with dict()
+            before serializing)
         """
-        return {
-            "angry": "#ff6b6b",
-            "calm": "#6495ed",
-            "sad": "#9370db",
-            "surprised": "#ffd700",
-            "happy": "#7cfc00",
-            "neutral": "#d3d3d3",
-            "anxious": "#ff7f50",
-            "disappointed": "#708090",
-            "fearful": "#8a2be2",
-            "excited": "#00ff7f",
-            "unknown": "#ffffff"
-        }
+        return EMOTION_COLORS
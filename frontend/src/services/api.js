@@ -101,6 +101,59 @@ export const sendChatMessage = async (data) => {
   }
 };
 
+/**
+ * Send a chat message to the AI coach and receive the reply as it is generated
+ * @param {Object} data - Same payload as sendChatMessage
+ * @param {Function} onChunk - Called with each piece of reply text as it arrives
+ * @returns {Promise<string>} The full reply text
+ */
+export const streamChatMessage = async (data, onChunk) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(data)
+    });
+    
+    if (!response.ok) {
+      throw new Error('Failed to send message');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = '';
+    
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      // Server-sent events are separated by a blank line
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const event of events) {
+        if (event.startsWith('event: done')) {
+          return reply;
+        }
+        if (event.startsWith('data: ')) {
+          const { text } = JSON.parse(event.slice(6));
+          reply += text;
+          onChunk(text);
+        }
+      }
+    }
+    
+    return reply;
+  } catch (error) {
+    console.error('Error streaming chat message:', error);
+    throw error;
+  }
+};
+
 /**
  * Generate audio narration of Gemini analysis
  * @param {Object} geminiAnalysis - The Gemini analysis object